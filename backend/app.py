@@ -1,16 +1,74 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
+import click
+import csv
+import hashlib
+import io
+import json
+import os
+import archive
 import auth
+import cache
 import encryption
 import certificate_gen
-from database import get_db_connection, init_db
+import certificate_render
+import change_bus
+import profiling
+import responses
+import write_queue
+from database import get_read_connection, init_db
+from idempotency import idempotent
+from repositories import DATABASE_ERRORS, repos
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize database on startup
-init_db()
+# Opt-in profiling: admin X-Profile header or sampled (profiling.SAMPLE_RATE).
+# Installed first: after_request hooks run in reverse order, so the sampler
+# keeps running through the compression installed below
+profiling.init_app(app, is_admin=lambda: require_auth('admin')[0] is not None)
+
+# Fast JSON serialization (orjson) + gzip/brotli compression
+responses.init_app(app)
+
+# Importing this module has no side effects. The schema is created by an
+# explicit migration step: `flask --app app init-db` or `python database.py`
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create or upgrade the database schema"""
+    init_db()
+
+@app.cli.command('archive')
+@click.option('--days', default=archive.ARCHIVE_HORIZON_DAYS, show_default=True,
+              help='Archive events older than this many days')
+def archive_command(days):
+    """Move past events and expired sessions to the archive database"""
+    click.echo(archive.run_archival(days))
+
+def warmup():
+    """
+    Optional hook to call in a worker before it takes traffic (server.py
+    --warmup, or a gunicorn post_fork): loads the lazily imported crypto and
+    QR libraries and opens the read pool and write queue, so the first real
+    requests don't pay for it.
+    """
+    import bcrypt  # noqa: F401
+    import qrcode  # noqa: F401
+    
+    key = encryption.generate_encryption_key()
+    encryption.decrypt_data(encryption.encrypt_data('warmup', key), key)
+    
+    conn = get_read_connection()
+    conn.execute('SELECT 1 FROM events LIMIT 1').fetchall()
+    conn.close()
+    write_queue.get_write_queue()
+
+@app.errorhandler(write_queue.WriteQueueFull)
+def write_queue_full(e):
+    """Shed load when the group-commit queue is saturated"""
+    return jsonify({'error': str(e)}), 503
 
 # ============================================
 # RUBRIC 1: AUTHENTICATION
@@ -39,17 +97,10 @@ def register():
     # Generate TOTP secret for MFA
     totp_secret = auth.generate_totp_secret()
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('''
-            INSERT INTO users (username, email, password_hash, salt, role, totp_secret)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (username, email, password_hash, salt, role, totp_secret))
-        
-        user_id = cursor.lastrowid
-        conn.commit()
+        # Group-committed on the shared writer thread
+        user_id = write_queue.execute_write(lambda cursor: repos(cursor).users.create(
+            username, email, password_hash, salt, role, totp_secret))
         
         # Generate TOTP URI for QR code (Google Authenticator setup)
         totp_uri = auth.generate_totp_uri(email, totp_secret)
@@ -63,8 +114,6 @@ def register():
         
     except Exception as e:
         return jsonify({'error': str(e)}), 400
-    finally:
-        conn.close()
 
 @app.route('/api/login', methods=['POST'])
 def login():
@@ -81,15 +130,8 @@ def login():
     if is_locked:
         return jsonify({'error': message}), 403
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT id, username, email, password_hash, role, totp_secret 
-        FROM users WHERE username = ?
-    ''', (username,))
-    
-    user = cursor.fetchone()
+    conn = get_read_connection()
+    user = repos(conn).users.get_by_username(username)
     conn.close()
     
     if not user:
@@ -124,15 +166,8 @@ def verify_totp():
     
     print(f"DEBUG: Verifying TOTP for user: {username}, code: {totp_code}")
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT id, username, email, role, totp_secret 
-        FROM users WHERE username = ?
-    ''', (username,))
-    
-    user = cursor.fetchone()
+    conn = get_read_connection()
+    user = repos(conn).users.get_by_username(username)
     conn.close()
     
     if not user:
@@ -162,31 +197,48 @@ def verify_totp():
         }
     }), 200
 
+@app.route('/api/logout', methods=['POST'])
+def logout():
+    """
+    NIST SP 800-63-2: Session Management
+    Revoke the current session token
+    """
+    session_token = request.headers.get('Authorization')
+    if not session_token:
+        return jsonify({'error': 'No session token provided'}), 401
+    
+    auth.revoke_session(session_token)
+    return jsonify({'message': 'Logged out'}), 200
+
 # ============================================
 # RUBRIC 2: AUTHORIZATION - ACCESS CONTROL
 # ============================================
 
-def require_auth(required_role=None):
+def require_auth(required_role=None, conn=None):
     """
     RUBRIC 2: ACCESS CONTROL IMPLEMENTATION
     Enforce access permissions programmatically
+    Pass an open connection to run both lookups on it
     """
     session_token = request.headers.get('Authorization')
     
     if not session_token:
         return None, jsonify({'error': 'No session token provided'}), 401
     
-    user_id = auth.validate_session(session_token)
+    own_conn = conn is None
+    if own_conn:
+        conn = get_read_connection()
     
-    if not user_id:
-        return None, jsonify({'error': 'Invalid or expired session'}), 401
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT id, username, email, role FROM users WHERE id = ?', (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    try:
+        user_id = auth.validate_session(session_token, conn=conn)
+        
+        if not user_id:
+            return None, jsonify({'error': 'Invalid or expired session'}), 401
+        
+        user = repos(conn).users.get_by_id(user_id)
+    finally:
+        if own_conn:
+            conn.close()
     
     if not user:
         return None, jsonify({'error': 'User not found'}), 404
@@ -195,7 +247,7 @@ def require_auth(required_role=None):
     if required_role and user['role'] != required_role:
         return None, jsonify({'error': f'Access denied. Required role: {required_role}'}), 403
     
-    return dict(user), None, None
+    return user, None, None
 
 # ============================================
 # EVENTS API - RUBRIC 2: ACCESS CONTROL
@@ -206,21 +258,49 @@ def get_events():
     """
     RUBRIC 2: ACCESS CONTROL - Policy Definition
     ALL users can view events (Public access)
+    Served from the shared cache; create_event invalidates it
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT e.*, u.username as organizer_name 
-        FROM events e 
-        JOIN users u ON e.organizer_id = u.id
-        ORDER BY e.date DESC
-    ''')
+    def load_events():
+        conn = get_read_connection()
+        try:
+            return repos(conn).events.list_all()
+        finally:
+            conn.close()
+    
+    return jsonify(cache.get_or_load(cache.EVENTS_LIST_KEY, load_events)), 200
+
+@app.route('/api/events/search', methods=['GET'])
+def search_events():
+    """
+    RUBRIC 2: ACCESS CONTROL - Policy Definition
+    ALL users can search events (Public access)
+    Full-text search over event name and description, ranked by bm25,
+    with optional date range (from/to) and pagination (page/per_page)
+    """
+    text = request.args.get('q', '')
+    date_from = request.args.get('from')
+    date_to = request.args.get('to')
     
-    events = cursor.fetchall()
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+    
+    conn = get_read_connection(snapshot=True)
+    events = repos(conn).events.search(text, date_from, date_to,
+                                       limit=per_page + 1, offset=(page - 1) * per_page)
     conn.close()
     
-    return jsonify([dict(event) for event in events]), 200
+    if events is None:
+        return jsonify({'error': 'Search query (q) is required'}), 400
+    
+    return jsonify({
+        'results': events[:per_page],
+        'page': page,
+        'per_page': per_page,
+        'has_more': len(events) > per_page
+    }), 200
 
 @app.route('/api/events', methods=['POST'])
 def create_event():
@@ -248,18 +328,22 @@ def create_event():
     encrypted_description = encryption.encrypt_data(description, encryption_key)
     key_string = encryption.key_to_string(encryption_key)
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    # Group-committed on the shared writer thread
+    event_id = write_queue.execute_write(lambda cursor: repos(cursor).events.create(
+        name, description, date, user['id'], max_capacity, encrypted_description, key_string))
     
-    cursor.execute('''
-        INSERT INTO events (name, description, date, organizer_id, max_capacity, 
-                          encrypted_details, encryption_key)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (name, description, date, user['id'], max_capacity, encrypted_description, key_string))
+    cache.invalidate(cache.EVENTS_LIST_KEY)
     
-    event_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    # Push the new event to every connected dashboard
+    change_bus.publish('event_created', {
+        'id': event_id,
+        'name': name,
+        'description': description,
+        'date': date,
+        'organizer_id': user['id'],
+        'max_capacity': max_capacity,
+        'organizer_name': user['username']
+    })
     
     return jsonify({
         'message': 'Event created successfully',
@@ -276,17 +360,14 @@ def get_event_details(event_id):
     if error_response:
         return error_response, status_code
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM events WHERE id = ?', (event_id,))
-    event = cursor.fetchone()
+    conn = get_read_connection()
+    event = repos(conn).events.get(event_id)
     conn.close()
     
     if not event:
         return jsonify({'error': 'Event not found'}), 404
     
-    event_dict = dict(event)
+    event_dict = event
     
     # RUBRIC 3: DECRYPTION - Decrypt sensitive details
     if event_dict['encrypted_details'] and event_dict['encryption_key']:
@@ -301,6 +382,7 @@ def get_event_details(event_id):
 # ============================================
 
 @app.route('/api/register-event', methods=['POST'])
+@idempotent
 def register_for_event():
     """
     RUBRIC 2: ACCESS CONTROL - Policy Definition
@@ -317,27 +399,28 @@ def register_for_event():
     data = request.json
     event_id = data.get('event_id')
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    def insert_registration(cursor):
+        registrations = repos(cursor).registrations
+        registration = registrations.get_with_event(registrations.create(user['id'], event_id))
+        if registration is None:
+            # SQLite doesn't enforce the foreign key: raising rolls the
+            # orphan row back with the write's savepoint
+            raise LookupError('Event not found')
+        return registration
     
     try:
-        cursor.execute('''
-            INSERT INTO registrations (student_id, event_id, status)
-            VALUES (?, ?, 'approved')
-        ''', (user['id'], event_id))
-        
-        registration_id = cursor.lastrowid
-        conn.commit()
-        
-        return jsonify({
-            'message': 'Registered for event successfully',
-            'registration_id': registration_id
-        }), 201
-        
-    except Exception as e:
+        registration = write_queue.execute_write(insert_registration)
+    except DATABASE_ERRORS + (LookupError,):
         return jsonify({'error': 'Already registered or event not found'}), 400
-    finally:
-        conn.close()
+    
+    registration_id = registration['id']
+    change_bus.publish('registration_created', registration,
+                       user_ids=[user['id']], roles=['organizer', 'admin'])
+    
+    return jsonify({
+        'message': 'Registered for event successfully',
+        'registration_id': registration_id
+    }), 201
 
 @app.route('/api/my-registrations', methods=['GET'])
 def get_my_registrations():
@@ -349,21 +432,9 @@ def get_my_registrations():
     if error_response:
         return error_response, status_code
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT r.*, e.name as event_name, e.date as event_date
-        FROM registrations r
-        JOIN events e ON r.event_id = e.id
-        WHERE r.student_id = ?
-        ORDER BY r.registered_at DESC
-    ''', (user['id'],))
-    
-    registrations = cursor.fetchall()
-    conn.close()
-    
-    return jsonify([dict(reg) for reg in registrations]), 200
+    return responses.stream_query(
+        get_read_connection(),
+        lambda conn: repos(conn).registrations.list_history_for_student_cursor(user['id'])), 200
 
 @app.route('/api/event-registrations/<int:event_id>', methods=['GET'])
 def get_event_registrations(event_id):
@@ -378,20 +449,9 @@ def get_event_registrations(event_id):
     if user['role'] not in ['organizer', 'admin']:
         return jsonify({'error': 'Access denied'}), 403
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT r.*, u.username as student_name, u.email as student_email
-        FROM registrations r
-        JOIN users u ON r.student_id = u.id
-        WHERE r.event_id = ?
-    ''', (event_id,))
-    
-    registrations = cursor.fetchall()
-    conn.close()
-    
-    return jsonify([dict(reg) for reg in registrations]), 200
+    return responses.stream_query(
+        get_read_connection(),
+        lambda conn: repos(conn).registrations.list_for_event_cursor(event_id)), 200
 
 # ============================================
 # ATTENDANCE & CERTIFICATES
@@ -399,6 +459,7 @@ def get_event_registrations(event_id):
 # ============================================
 
 @app.route('/api/mark-attendance', methods=['POST'])
+@idempotent
 def mark_attendance():
     """
     RUBRIC 2: ACCESS CONTROL - Policy Definition
@@ -414,19 +475,19 @@ def mark_attendance():
     data = request.json
     registration_id = data.get('registration_id')
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    registration = write_queue.execute_write(
+        lambda cursor: repos(cursor).registrations.mark_attendance(registration_id))
     
-    cursor.execute('''
-        UPDATE registrations SET attendance_marked = 1 WHERE id = ?
-    ''', (registration_id,))
-    
-    conn.commit()
-    conn.close()
+    if registration:
+        change_bus.publish('attendance_marked', {
+            'registration_id': registration_id,
+            'event_id': registration['event_id']
+        }, user_ids=[registration['student_id']], roles=['organizer', 'admin'])
     
     return jsonify({'message': 'Attendance marked successfully'}), 200
 
 @app.route('/api/generate-certificate', methods=['POST'])
+@idempotent
 def generate_certificate():
     """
     RUBRIC 4: DIGITAL SIGNATURE USING HASH
@@ -443,19 +504,9 @@ def generate_certificate():
     data = request.json
     registration_id = data.get('registration_id')
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     # Get registration details
-    cursor.execute('''
-        SELECT r.*, u.username as student_name, e.name as event_name, e.date as event_date
-        FROM registrations r
-        JOIN users u ON r.student_id = u.id
-        JOIN events e ON r.event_id = e.id
-        WHERE r.id = ? AND r.attendance_marked = 1
-    ''', (registration_id,))
-    
-    registration = cursor.fetchone()
+    conn = get_read_connection()
+    registration = repos(conn).registrations.get_attended(registration_id)
     conn.close()
     
     if not registration:
@@ -474,6 +525,9 @@ def generate_certificate():
         registration['event_date']
     )
     
+    change_bus.publish('certificate_issued', certificate,
+                       user_ids=[registration['student_id']], roles=['organizer', 'admin'])
+    
     return jsonify({
         'message': 'Certificate generated successfully',
         'certificate': certificate
@@ -489,19 +543,9 @@ def get_my_certificates():
     if error_response:
         return error_response, status_code
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT c.* FROM certificates c
-        JOIN registrations r ON c.registration_id = r.id
-        WHERE r.student_id = ?
-    ''', (user['id'],))
-    
-    certificates = cursor.fetchall()
-    conn.close()
-    
-    return jsonify([dict(cert) for cert in certificates]), 200
+    return responses.stream_query(
+        get_read_connection(),
+        lambda conn: repos(conn).certificates.list_history_for_student_cursor(user['id'])), 200
 
 @app.route('/api/verify-certificate/<certificate_id>', methods=['GET'])
 def verify_certificate(certificate_id):
@@ -509,7 +553,10 @@ def verify_certificate(certificate_id):
     RUBRIC 4: DIGITAL SIGNATURE VERIFICATION
     Anyone can verify certificate authenticity
     """
-    cert = certificate_gen.get_certificate_by_id(certificate_id)
+    # The id comes from the URL: unknown ids are not cached
+    cert = cache.get_or_load(cache.certificate_key(certificate_id),
+                             lambda: certificate_gen.get_certificate_by_id(certificate_id),
+                             cache_none=False)
     
     if not cert:
         return jsonify({'error': 'Certificate not found', 'valid': False}), 404
@@ -528,6 +575,65 @@ def verify_certificate(certificate_id):
         'certificate': cert
     }), 200
 
+@app.route('/api/certificates/<certificate_id>/document', methods=['GET'])
+def get_certificate_document(certificate_id):
+    """
+    RUBRIC 2: ACCESS CONTROL
+    Students can ONLY download their OWN certificates; organizers and admins any
+    RUBRIC 4 + 5: printable document with signature and QR code (?format=pdf|png)
+    """
+    user, error_response, status_code = require_auth()
+    if error_response:
+        return error_response, status_code
+    
+    fmt = request.args.get('format', 'pdf')
+    if fmt not in certificate_render.FORMATS:
+        return jsonify({'error': 'format must be pdf or png'}), 400
+    
+    conn = get_read_connection()
+    cert = repos(conn).certificates.get_with_student(certificate_id)
+    conn.close()
+    
+    if not cert:
+        return jsonify({'error': 'Certificate not found'}), 404
+    
+    if user['role'] == 'student' and cert['student_id'] != user['id']:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    return Response(certificate_render.render_certificate(cert, fmt),
+                    mimetype=certificate_render.FORMATS[fmt],
+                    headers={'Content-Disposition':
+                             f'attachment; filename="{certificate_render.document_name(cert, fmt)}"'})
+
+@app.route('/api/events/<int:event_id>/certificates/export', methods=['GET'])
+def export_event_certificates(event_id):
+    """
+    RUBRIC 2: ACCESS CONTROL
+    ONLY organizers and admins can export an event's certificates
+    Rendered across a process pool and streamed as a ZIP (?format=pdf|png)
+    """
+    user, error_response, status_code = require_auth()
+    if error_response:
+        return error_response, status_code
+    
+    if user['role'] not in ['organizer', 'admin']:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    fmt = request.args.get('format', 'pdf')
+    if fmt not in certificate_render.FORMATS:
+        return jsonify({'error': 'format must be pdf or png'}), 400
+    
+    conn = get_read_connection()
+    certificates = repos(conn).certificates.list_history_for_event(event_id)
+    conn.close()
+    
+    if not certificates:
+        return jsonify({'error': 'No certificates issued for this event'}), 404
+    
+    return Response(certificate_render.stream_zip(certificates, fmt), mimetype='application/zip',
+                    headers={'Content-Disposition':
+                             f'attachment; filename="event-{event_id}-certificates.zip"'})
+
 # ============================================
 # ADMIN ROUTES - RUBRIC 2: ACCESS CONTROL
 # ============================================
@@ -545,14 +651,310 @@ def get_all_users():
     if user['role'] != 'admin':
         return jsonify({'error': 'Admin access required'}), 403
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    return responses.stream_query(get_read_connection(),
+                                  lambda conn: repos(conn).users.list_all_cursor()), 200
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def get_profiles():
+    """
+    RUBRIC 2: ACCESS CONTROL
+    ONLY admins can list recent request profiles (optionally ?route=login)
+    """
+    user, error_response, status_code = require_auth()
+    if error_response:
+        return error_response, status_code
     
-    cursor.execute('SELECT id, username, email, role, created_at FROM users')
-    users = cursor.fetchall()
-    conn.close()
+    if user['role'] != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    return jsonify(profiling.list_profiles(request.args.get('route'), limit)), 200
+
+@app.route('/api/admin/profiles/<route>/<name>', methods=['GET'])
+def get_profile(route, name):
+    """
+    RUBRIC 2: ACCESS CONTROL
+    ONLY admins can download a profile (collapsed stacks for flamegraph.pl)
+    """
+    user, error_response, status_code = require_auth()
+    if error_response:
+        return error_response, status_code
+    
+    if user['role'] != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    return send_from_directory(os.path.abspath(profiling.PROFILE_DIR), f'{route}/{name}.folded',
+                               mimetype='text/plain')
+
+# Rows hashed and inserted per transaction during bulk import
+BULK_IMPORT_BATCH_SIZE = 200
+# Fields read from each imported row; each must be a string or absent
+BULK_IMPORT_FIELDS = ('username', 'email', 'password', 'role')
+
+def read_bulk_users(stream, fmt):
+    """Yield user records from a CSV or NDJSON upload without loading it whole"""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        yield from csv.DictReader(text)
+    else:
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Reported per row as malformed by import_user_batch
+                yield None
+
+def import_user_batch(batch):
+    """
+    Validate, hash (in parallel) and insert one batch of users in a
+    single transaction. Returns one result per row; a bad row never
+    aborts the rest of the batch.
+    """
+    results = {}
+    valid = []
+    
+    for row_number, record in batch:
+        if not isinstance(record, dict):
+            results[row_number] = {'row': row_number, 'status': 'error', 'error': 'Malformed row'}
+            continue
+        
+        if any(record.get(field) is not None and not isinstance(record.get(field), str)
+               for field in BULK_IMPORT_FIELDS):
+            results[row_number] = {'row': row_number, 'status': 'error',
+                                   'error': f"{', '.join(BULK_IMPORT_FIELDS)} must be strings"}
+            continue
+        
+        username = record.get('username')
+        email = record.get('email')
+        password = record.get('password') or ''
+        role = record.get('role') or 'student'
+        
+        if not username or not email:
+            results[row_number] = {'row': row_number, 'status': 'error',
+                                   'error': 'username and email are required'}
+            continue
+        
+        # Validate password strength (NIST SP 800-63-2)
+        is_valid, message = auth.validate_password_strength(password)
+        if not is_valid:
+            results[row_number] = {'row': row_number, 'status': 'error',
+                                   'username': username, 'error': message}
+            continue
+        
+        valid.append((row_number, username, email, password, role))
+    
+    # RUBRIC 4: HASHING WITH SALT - bcrypt on a parallel pool
+    hashes = auth.hash_passwords([v[3] for v in valid])
+    totp_secrets = [auth.generate_totp_secret() for _ in valid]
+    
+    def insert_users(cursor):
+        """The whole batch as one write; a failing row only skips itself"""
+        users = repos(cursor).users
+        created = {}
+        for (row_number, username, email, _, role), (password_hash, salt), totp_secret in zip(
+                valid, hashes, totp_secrets):
+            try:
+                created[row_number] = users.create(username, email, password_hash, salt, role,
+                                                   totp_secret)
+            except DATABASE_ERRORS as e:
+                created[row_number] = e
+        return created
+    
+    # Group-committed on the shared writer thread
+    created = write_queue.execute_write(insert_users)
+    
+    for (row_number, username, email, _, _), totp_secret in zip(valid, totp_secrets):
+        user_id = created[row_number]
+        if isinstance(user_id, Exception):
+            results[row_number] = {'row': row_number, 'status': 'error',
+                                   'username': username, 'error': str(user_id)}
+            continue
+        
+        results[row_number] = {
+            'row': row_number,
+            'status': 'created',
+            'user_id': user_id,
+            'username': username,
+            'totp_uri': auth.generate_totp_uri(email, totp_secret)
+        }
+    
+    return [results[row_number] for row_number, _ in batch]
+
+@app.route('/api/admin/users/import', methods=['POST'])
+def bulk_import_users():
+    """
+    RUBRIC 2: ACCESS CONTROL
+    ONLY admins can bulk-import users
+    Accepts a CSV (username,email,password,role) or NDJSON upload, either
+    as multipart field "file" or as the raw request body, and streams back
+    one NDJSON result per row followed by a summary line.
+    """
+    user, error_response, status_code = require_auth()
+    if error_response:
+        return error_response, status_code
+    
+    if user['role'] != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        is_csv = upload.filename.lower().endswith('.csv') or upload.mimetype == 'text/csv'
+    else:
+        stream = request.stream
+        is_csv = request.mimetype == 'text/csv'
+    
+    records = read_bulk_users(stream, 'csv' if is_csv else 'ndjson')
+    
+    def generate():
+        created = failed = 0
+        batch = []
+        
+        def flush():
+            nonlocal created, failed
+            for result in import_user_batch(batch):
+                if result['status'] == 'created':
+                    created += 1
+                else:
+                    failed += 1
+                yield json.dumps(result) + '\n'
+            batch.clear()
+        
+        try:
+            for row_number, record in enumerate(records, start=1):
+                batch.append((row_number, record))
+                if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+                    yield from flush()
+        except (UnicodeDecodeError, csv.Error) as e:
+            yield json.dumps({'status': 'error', 'error': f'Upload unreadable: {e}'}) + '\n'
+        
+        yield from flush()
+        yield json.dumps({'summary': True, 'created': created, 'failed': failed}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# ============================================
+# REAL-TIME UPDATES (Server-Sent Events)
+# ============================================
+
+@app.route('/api/changes/ticket', methods=['POST'])
+def create_stream_ticket():
+    """
+    RUBRIC 2: ACCESS CONTROL
+    Single-use ticket for opening /api/changes with an EventSource
+    """
+    user, error_response, status_code = require_auth()
+    if error_response:
+        return error_response, status_code
+    
+    return jsonify({
+        'ticket': auth.issue_stream_ticket(user['id']),
+        'expires_in': auth.STREAM_TICKET_TTL
+    }), 201
+
+@app.route('/api/changes', methods=['GET'])
+def stream_changes():
+    """
+    RUBRIC 2: ACCESS CONTROL
+    Server-Sent Events stream of event/registration/certificate deltas,
+    filtered per user. EventSource cannot send headers, so browsers
+    authenticate with ?ticket= from POST /api/changes/ticket (never with
+    the session token) and resume with ?last_event_id=.
+    """
+    session_token = request.headers.get('Authorization')
+    ticket = request.args.get('ticket')
+    if not session_token and not ticket:
+        return jsonify({'error': 'No session token or stream ticket provided'}), 401
+    
+    conn = get_read_connection()
+    try:
+        user_id = (auth.validate_session(session_token, conn=conn) if session_token
+                   else auth.redeem_stream_ticket(ticket))
+        user = None
+        if user_id:
+            user = repos(conn).users.get_by_id(user_id)
+    finally:
+        conn.close()
+    
+    if not user:
+        return jsonify({'error': 'Invalid or expired session'}), 401
+    
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID')
+                            or request.args.get('last_event_id', ''))
+    except ValueError:
+        last_event_id = None
+    
+    subscriber = change_bus.bus.subscribe(user['id'], user['role'], last_event_id)
+    response = Response(change_bus.bus.stream(subscriber), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# ============================================
+# DASHBOARD BOOTSTRAP
+# ============================================
+
+# Sections loaded by each role's dashboard
+DASHBOARD_SECTIONS = {
+    'student': ['events', 'registrations', 'certificates'],
+    'organizer': ['events'],
+    'admin': ['users', 'events']
+}
+
+def section_etag(data):
+    """Stable content hash of one dashboard section"""
+    payload = json.dumps(data, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+@app.route('/api/dashboard', methods=['GET'])
+def get_dashboard():
+    """
+    RUBRIC 2: ACCESS CONTROL
+    Role-aware bootstrap for the dashboards: authenticates once and runs
+    every section query on one connection inside one read transaction.
+    Each section carries its own ETag; send it back as ?<section>_etag=
+    and an unchanged section is returned without data.
+    """
+    conn = get_read_connection()
+    
+    try:
+        # One read transaction gives all sections a consistent snapshot
+        conn.execute('BEGIN')
+        
+        user, error_response, status_code = require_auth(conn=conn)
+        if error_response:
+            return error_response, status_code
+        
+        r = repos(conn)
+        loaders = {
+            'events': r.events.list_all,
+            'registrations': lambda: r.registrations.list_history_for_student(user['id']),
+            'certificates': lambda: r.certificates.list_history_for_student(user['id']),
+            'users': r.users.list_all
+        }
+        
+        sections = {}
+        for name in DASHBOARD_SECTIONS.get(user['role'], []):
+            data = loaders[name]()
+            etag = section_etag(data)
+            if request.args.get(f'{name}_etag') == etag:
+                sections[name] = {'etag': etag, 'not_modified': True}
+            else:
+                sections[name] = {'etag': etag, 'data': data}
+    finally:
+        conn.rollback()
+        conn.close()
     
-    return jsonify([dict(u) for u in users]), 200
+    response = jsonify({'user': user, 'sections': sections})
+    response.set_etag(section_etag({name: s['etag'] for name, s in sections.items()}))
+    return response.make_conditional(request)
 
 # ============================================
 # RUN SERVER
@@ -0,0 +1,152 @@
+"""
+Hot/cold tiering: move past events out of the live tables.
+
+Events older than ARCHIVE_HORIZON_DAYS, with their registrations and
+certificates, and expired sessions are moved to the archive database
+(database.ARCHIVE_DATABASE), which read connections ATTACH as "archive".
+
+Each batch is copied first (one transaction on the archive, reading the
+live database through WAL, so nothing waits on it) and then deleted from
+the live tables through the group-commit write queue. The copy is an
+upsert and the delete only removes rows that are in the archive, as
+they are there, so the job can be stopped at any point and simply run
+again.
+
+Usage (from backend/):  python archive.py [horizon_days]
+                   or:  flask --app app archive [--days N]
+"""
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+import cache
+import database
+from write_queue import execute_write
+
+# Events dated more than this many days ago are archived
+ARCHIVE_HORIZON_DAYS = 365
+# Events (or sessions) moved per batch
+ARCHIVE_BATCH_SIZE = 100
+# Seconds to yield to live traffic between batches
+ARCHIVE_BATCH_PAUSE = 0.05
+
+COLUMNS = {
+    'events': 'id, name, description, date, organizer_id, max_capacity, '
+              'encrypted_details, encryption_key, created_at',
+    'registrations': 'id, student_id, event_id, status, attendance_marked, registered_at',
+    'certificates': 'id, registration_id, certificate_id, student_name, event_name, event_date, '
+                    'digital_signature, qr_code_path, issued_at',
+    'sessions': 'id, user_id, session_token, created_at, expires_at'
+}
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+def _copy(conn, table, where, params):
+    columns = COLUMNS[table]
+    conn.execute(f'''
+        INSERT OR REPLACE INTO {table} ({columns})
+        SELECT {columns} FROM live.{table} WHERE {where}
+    ''', params)
+
+def _ids(conn, sql, params):
+    return [row[0] for row in conn.execute(sql, params)]
+
+def _delete_event_batch(cursor, event_ids, registrations, certificate_ids):
+    """
+    Runs on the writer thread. registrations are the archived
+    (id, status, attendance_marked) rows: one changed since the copy
+    (attendance marked, say) is left in place, as are rows written after
+    the copy (a late certificate) and their parents, until the next run
+    copies them again. Returns the rows deleted per table.
+    """
+    deleted = {'events': 0, 'registrations': 0, 'certificates': 0}
+    if certificate_ids:
+        cursor.execute(f'DELETE FROM certificates WHERE id IN ({_placeholders(certificate_ids)})',
+                       certificate_ids)
+        deleted['certificates'] = cursor.rowcount
+    if registrations:
+        cursor.executemany('''
+            DELETE FROM registrations
+            WHERE id = ? AND status IS ? AND attendance_marked IS ?
+              AND NOT EXISTS (SELECT 1 FROM certificates c WHERE c.registration_id = registrations.id)
+        ''', registrations)
+        deleted['registrations'] = cursor.rowcount
+    cursor.execute(f'''
+        DELETE FROM events
+        WHERE id IN ({_placeholders(event_ids)})
+          AND NOT EXISTS (SELECT 1 FROM registrations r WHERE r.event_id = events.id)
+    ''', event_ids)
+    deleted['events'] = cursor.rowcount
+    return deleted
+
+def _delete_sessions(cursor, session_ids):
+    cursor.execute(f'DELETE FROM sessions WHERE id IN ({_placeholders(session_ids)})', session_ids)
+    return cursor.rowcount
+
+def archive_events(conn, cutoff, batch_size):
+    moved = {'events': 0, 'registrations': 0, 'certificates': 0}
+    last_id = 0
+    while True:
+        event_ids = _ids(conn, '''
+            SELECT id FROM live.events WHERE date < ? AND id > ? ORDER BY id LIMIT ?
+        ''', (cutoff, last_id, batch_size))
+        if not event_ids:
+            return moved
+        last_id = event_ids[-1]
+        marks = _placeholders(event_ids)
+    
+        with conn:
+            _copy(conn, 'events', f'id IN ({marks})', event_ids)
+            _copy(conn, 'registrations', f'event_id IN ({marks})', event_ids)
+            _copy(conn, 'certificates', f'''registration_id IN (
+                SELECT id FROM live.registrations WHERE event_id IN ({marks}))''', event_ids)
+    
+        # Only what is now safely in the archive gets deleted
+        registrations = conn.execute(f'''
+            SELECT id, status, attendance_marked FROM registrations WHERE event_id IN ({marks})
+        ''', event_ids).fetchall()
+        certificate_ids = _ids(conn, f'''
+            SELECT c.id FROM certificates c JOIN registrations r ON c.registration_id = r.id
+            WHERE r.event_id IN ({marks})
+        ''', event_ids)
+        deleted = execute_write(_delete_event_batch, event_ids, registrations, certificate_ids)
+        for table, count in deleted.items():
+            moved[table] += count
+        time.sleep(ARCHIVE_BATCH_PAUSE)
+
+def archive_sessions(conn, now, batch_size):
+    moved = 0
+    last_id = 0
+    while True:
+        session_ids = _ids(conn, '''
+            SELECT id FROM live.sessions WHERE expires_at < ? AND id > ? ORDER BY id LIMIT ?
+        ''', (now, last_id, batch_size))
+        if not session_ids:
+            return moved
+        last_id = session_ids[-1]
+    
+        with conn:
+            _copy(conn, 'sessions', f'id IN ({_placeholders(session_ids)})', session_ids)
+        moved += execute_write(_delete_sessions, session_ids)
+        time.sleep(ARCHIVE_BATCH_PAUSE)
+
+def run_archival(horizon_days=ARCHIVE_HORIZON_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move everything past the horizon to the archive; returns counts moved"""
+    cutoff = (date.today() - timedelta(days=horizon_days)).isoformat()
+    
+    conn = sqlite3.connect(database.ARCHIVE_DATABASE, timeout=30)
+    conn.execute('ATTACH DATABASE ? AS live', (database.DATABASE,))
+    try:
+        moved = archive_events(conn, cutoff, batch_size)
+        moved['sessions'] = archive_sessions(conn, datetime.now().isoformat(), batch_size)
+    finally:
+        conn.close()
+    
+    if moved['events']:
+        cache.invalidate(cache.EVENTS_LIST_KEY)
+    return moved
+
+if __name__ == '__main__':
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_HORIZON_DAYS
+    print(f"📦 Archived: {run_archival(days)}")
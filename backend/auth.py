@@ -1,12 +1,17 @@
-import bcrypt
 import pyotp
 import secrets
 import hashlib
+import os
+import cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from database import get_db_connection
+from database import get_read_connection
+from repositories import repos
+from write_queue import execute_write
 
 # RUBRIC 1: AUTHENTICATION (NIST SP 800-63-2 Compliant)
 # RUBRIC 4: HASHING WITH SALT
+# bcrypt is imported on first use so workers that never hash start faster
 
 def validate_password_strength(password):
     """
@@ -32,12 +37,24 @@ def hash_password(password):
     RUBRIC 4: HASHING WITH SALT
     Hash password with salt using bcrypt
     """
+    import bcrypt
     salt = bcrypt.gensalt()
     password_hash = bcrypt.hashpw(password.encode('utf-8'), salt)
     return password_hash.decode('utf-8'), salt.decode('utf-8')
 
+def hash_passwords(passwords, max_workers=None):
+    """
+    RUBRIC 4: HASHING WITH SALT (bulk)
+    Hash many passwords in parallel. bcrypt releases the GIL while
+    hashing, so a thread pool scales across cores.
+    Returns (password_hash, salt) tuples in input order.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        return list(pool.map(hash_password, passwords))
+
 def verify_password(password, password_hash):
     """Verify password against hash"""
+    import bcrypt
     return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
 
 def generate_totp_secret():
@@ -70,34 +87,34 @@ def create_session(user_id):
     NIST SP 800-63-2: Session Management
     Create session with 30-minute timeout
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     session_token = generate_session_token()
     created_at = datetime.now()
     expires_at = created_at + timedelta(minutes=30)
     
-    cursor.execute('''
-        INSERT INTO sessions (user_id, session_token, created_at, expires_at)
-        VALUES (?, ?, ?, ?)
-    ''', (user_id, session_token, created_at.isoformat(), expires_at.isoformat()))
-    
-    conn.commit()
-    conn.close()
+    # Group-committed on the shared writer thread
+    execute_write(lambda cursor: repos(cursor).sessions.create(
+        user_id, session_token, created_at.isoformat(), expires_at.isoformat()))
     
     return session_token
 
-def validate_session(session_token):
-    """Validate session token and check expiry"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT user_id, expires_at FROM sessions WHERE session_token = ?
-    ''', (session_token,))
-    
-    session = cursor.fetchone()
-    conn.close()
+def validate_session(session_token, conn=None):
+    """
+    Validate session token and check expiry
+    Pass an open connection to reuse it (the caller then owns closing it)
+    Lookups are cached across processes until the session is revoked
+    """
+    def load_session():
+        if conn is not None:
+            return repos(conn).sessions.get(session_token)
+        read_conn = get_read_connection()
+        try:
+            return repos(read_conn).sessions.get(session_token)
+        finally:
+            read_conn.close()
+    
+    # Unknown tokens are not cached, so bogus tokens can't flood the cache
+    session = cache.get_or_load(cache.session_key(session_token), load_session,
+                                cache_none=False)
     
     if not session:
         return None
@@ -108,19 +125,48 @@ def validate_session(session_token):
     
     return session['user_id']
 
+def revoke_session(session_token):
+    """
+    NIST SP 800-63-2: Session Management
+    End a session (logout) and drop it from every process's cache
+    """
+    execute_write(lambda cursor: repos(cursor).sessions.delete(session_token))
+    cache.invalidate(cache.session_key(session_token))
+
+# Seconds a stream ticket stays redeemable
+STREAM_TICKET_TTL = 30
+
+def _stream_ticket_key(ticket):
+    return 'stream-ticket:' + hashlib.sha256(ticket.encode('utf-8')).hexdigest()
+
+def issue_stream_ticket(user_id):
+    """
+    NIST SP 800-63-2: Session Management
+    Short-lived, single-use ticket for opening the change stream.
+    EventSource can't send headers, and a session token in the URL would
+    end up in access logs, proxy logs and browser history
+    """
+    ticket = secrets.token_urlsafe(32)
+    cache.get_cache().store.set(_stream_ticket_key(ticket), str(user_id), ex=STREAM_TICKET_TTL)
+    return ticket
+
+def redeem_stream_ticket(ticket):
+    """User id the ticket was issued to, or None; a ticket works only once"""
+    store = cache.get_cache().store
+    key = _stream_ticket_key(ticket)
+    user_id = store.get(key)
+    # Only the request whose delete removes it may use it
+    if user_id is None or not store.delete(key):
+        return None
+    return int(user_id)
+
 def check_account_lockout(username):
     """
     NIST SP 800-63-2: Account Lockout
     Lock account after 3 failed attempts for 15 minutes
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT failed_attempts, locked_until FROM users WHERE username = ?
-    ''', (username,))
-    
-    user = cursor.fetchone()
+    conn = get_read_connection()
+    user = repos(conn).users.get_by_username(username)
     conn.close()
     
     if not user:
@@ -135,36 +181,13 @@ def check_account_lockout(username):
 
 def increment_failed_attempts(username):
     """Increment failed login attempts"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        UPDATE users SET failed_attempts = failed_attempts + 1 WHERE username = ?
-    ''', (username,))
-    
-    cursor.execute('''
-        SELECT failed_attempts FROM users WHERE username = ?
-    ''', (username,))
-    
-    user = cursor.fetchone()
+    locked_until = datetime.now() + timedelta(minutes=15)
     
-    if user['failed_attempts'] >= 3:
-        locked_until = datetime.now() + timedelta(minutes=15)
-        cursor.execute('''
-            UPDATE users SET locked_until = ? WHERE username = ?
-        ''', (locked_until.isoformat(), username))
-    
-    conn.commit()
-    conn.close()
+    # Group-committed on the shared writer thread
+    execute_write(lambda cursor: repos(cursor).users.increment_failed_attempts(
+        username, 3, locked_until.isoformat()))
 
 def reset_failed_attempts(username):
     """Reset failed attempts after successful login"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        UPDATE users SET failed_attempts = 0, locked_until = NULL WHERE username = ?
-    ''', (username,))
-    
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    # Group-committed on the shared writer thread
+    execute_write(lambda cursor: repos(cursor).users.reset_failed_attempts(username))
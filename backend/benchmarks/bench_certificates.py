@@ -0,0 +1,88 @@
+"""
+Benchmark: certificates rendered per second.
+
+Compares
+- rendering from scratch (template decoded and fonts loaded per
+  certificate, what a naive per-request renderer does)
+- the cached, pre-decoded template in one process
+- the batch export: process pool + streamed ZIP
+
+Usage (from backend/):  python benchmarks/bench_certificates.py [certificates] [workers] [pdf|png]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import certificate_gen
+import certificate_render
+
+def make_certificates(count):
+    certificates = []
+    for i in range(count):
+        certificate_id = f'CERT-20260101000000-{i:08x}'
+        signature = certificate_gen.generate_digital_signature(
+            certificate_id, f'student{i}', 'Robotics Workshop', '2026-01-01')
+        certificates.append({
+            'certificate_id': certificate_id,
+            'student_name': f'student{i}',
+            'event_name': 'Robotics Workshop',
+            'event_date': '2026-01-01',
+            'digital_signature': signature
+        })
+    return certificates
+
+def report(label, count, elapsed):
+    print(f'{label:<36} {count / elapsed:>10.1f} certificates/s')
+
+def from_scratch(certificates, fmt):
+    for cert in certificates:
+        certificate_render.load_template.cache_clear()
+        certificate_render.load_font.cache_clear()
+        certificate_render.render_certificate(cert, fmt)
+
+def cached(certificates, fmt):
+    certificate_render.load_template()
+    for cert in certificates:
+        certificate_render.render_certificate(cert, fmt)
+
+def batch(certificates, fmt, pool):
+    return sum(len(chunk) for chunk in certificate_render.stream_zip(certificates, fmt, pool))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    fmt = sys.argv[3] if len(sys.argv) > 3 else 'pdf'
+    certificates = make_certificates(count)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # A real background image on disk, so "from scratch" pays for decoding it
+        certificate_render.TEMPLATE_PATH = os.path.join(tmp, 'template.png')
+        certificate_render.load_template().save(certificate_render.TEMPLATE_PATH)
+        print(f'{count} certificates, {fmt}, {workers} workers\n')
+    
+        start = time.perf_counter()
+        from_scratch(certificates, fmt)
+        report('from scratch (per request)', count, time.perf_counter() - start)
+    
+        certificate_render.load_template.cache_clear()
+        start = time.perf_counter()
+        cached(certificates, fmt)
+        report('cached template, 1 process', count, time.perf_counter() - start)
+    
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=certificate_render.load_template)
+        # Start the workers before timing (a server keeps its pool warm)
+        list(pool.map(abs, range(workers)))
+        start = time.perf_counter()
+        size = batch(certificates, fmt, pool)
+        report(f'batch ZIP, {workers}-process pool', count, time.perf_counter() - start)
+        print(f'\nZIP size: {size / 1e6:.2f} MB')
+        pool.shutdown()
+
+if __name__ == '__main__':
+    main()
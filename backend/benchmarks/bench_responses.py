@@ -0,0 +1,84 @@
+"""
+Benchmark: bytes and CPU per response for the JSON/compression layer.
+
+Rows are fetched the way the repositories return them (Repo.records:
+tuple cursor, one shared column header) and compared with the old
+[dict(row) ...] over sqlite3.Row; then Flask's default jsonify is
+compared with the FastJSONProvider, uncompressed / gzip / brotli (if
+installed).
+
+Usage (from backend/):  python benchmarks/bench_responses.py [rows]
+"""
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask, jsonify
+import repositories
+import responses
+
+ROUNDS = 20
+
+def make_db(count):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''
+        CREATE TABLE events (id INTEGER PRIMARY KEY, name TEXT, description TEXT,
+                             date TEXT, organizer_id INTEGER, max_capacity INTEGER,
+                             encrypted_details TEXT, encryption_key TEXT, created_at TEXT)
+    ''')
+    conn.executemany(
+        'INSERT INTO events VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(f'Event {i}', f'Description of event number {i} ' * 3, '2026-05-01', i % 50, 100,
+          os.urandom(48).hex(), os.urandom(32).hex(), '2026-01-01 10:00:00')
+         for i in range(count)]
+    )
+    return conn
+
+def fetch_dict_rows(conn):
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute('SELECT * FROM events').fetchall()]
+    finally:
+        conn.row_factory = None
+
+def fetch_records(conn):
+    return repositories.Repo.records(conn.execute('SELECT * FROM events'))
+
+def measure(label, build, unit='bytes'):
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        size = build()
+    cpu_ms = (time.process_time() - start) / ROUNDS * 1000
+    print(f'{label:<32} {size:>12,} {unit:<5} {cpu_ms:>10.2f} ms CPU')
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    conn = make_db(count)
+    records = fetch_records(conn)
+    print(f'{count} rows, orjson={"yes" if responses.orjson else "no"}, '
+          f'brotli={"yes" if responses.brotli else "no"}\n')
+    
+    default_app = Flask('default')
+    fast_app = Flask('fast')
+    fast_app.json = responses.FastJSONProvider(fast_app)
+    
+    measure('fetch [dict(row)]', lambda: len(fetch_dict_rows(conn)), 'rows')
+    measure('fetch Repo.records', lambda: len(fetch_records(conn)), 'rows')
+    print()
+    
+    with default_app.app_context():
+        measure('default jsonify(records)', lambda: len(jsonify(records).get_data()))
+    
+    with fast_app.app_context():
+        measure('fast jsonify(records)', lambda: len(jsonify(records).get_data()))
+        measure('fast jsonify(records) + gzip',
+                lambda: len(responses.compress_body(jsonify(records).get_data(), 'gzip')))
+        if responses.brotli is not None:
+            measure('fast jsonify(records) + br',
+                    lambda: len(responses.compress_body(jsonify(records).get_data(), 'br')))
+
+if __name__ == '__main__':
+    main()
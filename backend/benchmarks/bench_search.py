@@ -0,0 +1,89 @@
+"""
+Benchmark: EventsRepo.search latency over a large events table.
+
+Builds N events (default 100k) whose names and descriptions draw words
+from a Zipf-distributed vocabulary, so some terms match most events and
+others only a handful, then times one page of search results for terms
+of increasing rarity, a two-letter prefix (search-as-you-type), and a
+common term with a date range.
+
+Usage (from backend/):  python benchmarks/bench_search.py [events]
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import database
+import repositories
+
+VOCABULARY_SIZE = 5000
+ROUNDS = 5
+
+def word(rank):
+    """The rank-th most common word: 4-8 pseudo-random letters"""
+    rng = random.Random(rank)
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 8)))
+
+def make_db(path, count):
+    database.init_db(path, os.path.join(os.path.dirname(path), 'bench_archive.db'))
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (username, email, password_hash, salt, role) "
+                 "VALUES ('org', 'org@x.io', 'h', 's', 'organizer')")
+    rng = random.Random(42)
+    weights = [1 / rank for rank in range(1, VOCABULARY_SIZE + 1)]
+    ranks = range(1, VOCABULARY_SIZE + 1)
+    
+    def text(words):
+        return ' '.join(word(r) for r in rng.choices(ranks, weights, k=words))
+    
+    conn.executemany(
+        'INSERT INTO events (name, description, date, organizer_id, max_capacity) '
+        'VALUES (?, ?, ?, 1, 100)',
+        [(text(4), text(30), f'20{rng.randint(20, 29)}-{rng.randint(1, 12):02d}-01')
+         for _ in range(count)]
+    )
+    conn.commit()
+    conn.close()
+
+def matches(conn, term, prefix=False):
+    return conn.execute('SELECT count(*) FROM events_fts WHERE events_fts MATCH ?',
+                        (f'"{term}"' + ('*' if prefix else ''),)).fetchone()[0]
+
+def measure(events, label, **kwargs):
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        events.search(**kwargs)
+        times.append((time.perf_counter() - start) * 1000)
+    print(f'{label:<40} {statistics.median(times):>8.2f} ms (median)')
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        make_db(path, count)
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        events = repositories.repos(conn).events
+        print(f'{count} events, page of 20\n')
+        
+        for rank in (1, 10, 100, 1000):
+            term = word(rank)
+            measure(events, f'"{term}" ({matches(conn, term):,} matches)', text=term)
+        prefix = word(1)[:2]
+        measure(events, f'"{prefix}*" ({matches(conn, prefix, True):,} matches)', text=prefix)
+        measure(events, f'"{word(1)}" page 50', text=word(1), offset=49 * 20)
+        measure(events, f'"{word(1)}" from 2028-01-01', text=word(1), date_from='2028-01-01')
+        measure(events, f'"{word(1)}" 2025-01-01..2025-01-31', text=word(1),
+                date_from='2025-01-01', date_to='2025-01-31')
+        measure(events, f'"{word(1)} {word(10)}"', text=f'{word(1)} {word(10)}')
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: worker cold start, import time and time to first request.
+
+Each run is a fresh interpreter that imports app and serves one
+GET /api/events through the test client, against a database created
+beforehand (as the init-db migration step would). Also reports which
+heavy libraries got loaded along the way; they should only appear once
+a request actually needs them.
+
+Exits non-zero if importing app loads a heavy library or the median
+import time exceeds --max-import-ms, so it can run as a CI check.
+
+Usage (from backend/):  python benchmarks/bench_startup.py [runs] [--max-import-ms N]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+HEAVY_MODULES = ['bcrypt', 'cryptography', 'qrcode', 'PIL']
+
+# Runs inside the child interpreter (cwd = a temp dir holding database.db)
+CHILD = '''
+import json, sys, time
+sys.path.insert(0, %r)
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+heavy_on_import = [m for m in %r if m in sys.modules]
+response = app.app.test_client().get('/api/events')
+first = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_request_ms': (first - start) * 1000,
+    'status': response.status_code,
+    'heavy_on_import': heavy_on_import,
+    'heavy_after_request': [m for m in %r if m in sys.modules],
+}))
+'''
+
+def run_child(workdir):
+    code = CHILD % (BACKEND, HEAVY_MODULES, HEAVY_MODULES)
+    out = subprocess.run([sys.executable, '-c', code], cwd=workdir, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    args = sys.argv[1:]
+    max_import_ms = None
+    if '--max-import-ms' in args:
+        i = args.index('--max-import-ms')
+        max_import_ms = float(args[i + 1])
+        del args[i:i + 2]
+    runs = int(args[0]) if args else 5
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run([sys.executable, os.path.join(BACKEND, 'database.py')], cwd=tmp,
+                       check=True, capture_output=True)
+        results = [run_child(tmp) for _ in range(runs)]
+    
+    import_ms = statistics.median(r['import_ms'] for r in results)
+    first_ms = statistics.median(r['first_request_ms'] for r in results)
+    heavy = results[-1]['heavy_on_import']
+    print(f'{runs} cold starts (median)\n')
+    print(f'{"import app":<28} {import_ms:>8.1f} ms')
+    print(f'{"time to first request":<28} {first_ms:>8.1f} ms  (GET /api/events -> {results[-1]["status"]})')
+    print(f'{"heavy libs after import":<28} {", ".join(heavy) or "none"}')
+    print(f'{"heavy libs after request":<28} {", ".join(results[-1]["heavy_after_request"]) or "none"}')
+    
+    failed = bool(heavy)
+    if max_import_ms is not None and import_ms > max_import_ms:
+        print(f'\nimport time over budget ({import_ms:.1f} > {max_import_ms:.1f} ms)')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: writes per second, per-request commits vs the group-commit queue.
+
+Each of N threads inserts session rows, either the old way (own
+connection + commit per write) or through write_queue.WriteQueue. Both
+sides use the same PRAGMA synchronous (SQLite's default FULL unless one
+is given), so the difference is down to group commit alone.
+
+Usage (from backend/):  python benchmarks/bench_writes.py [threads] [writes_per_thread] [FULL|NORMAL]
+"""
+import os
+import secrets
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import write_queue
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('''
+        CREATE TABLE sessions (id INTEGER PRIMARY KEY, user_id INTEGER,
+                               session_token TEXT UNIQUE, expires_at TEXT)
+    ''')
+    conn.commit()
+    conn.close()
+
+def insert_session(cursor):
+    cursor.execute('INSERT INTO sessions (user_id, session_token, expires_at) VALUES (?, ?, ?)',
+                   (1, secrets.token_urlsafe(16), '2030-01-01T00:00:00'))
+
+def per_request_commit(path):
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        if write_queue.WRITER_SYNCHRONOUS:
+            conn.execute(f'PRAGMA synchronous = {write_queue.WRITER_SYNCHRONOUS}')
+        insert_session(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+def run(label, threads, writes, write):
+    errors = []
+    
+    def worker():
+        for _ in range(writes):
+            try:
+                write()
+            except sqlite3.Error as e:
+                errors.append(e)
+    
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    total = threads * writes
+    print(f'{label:<24} {total / elapsed:>10,.0f} writes/s  ({len(errors)} errors)')
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    write_queue.WRITER_SYNCHRONOUS = sys.argv[3].upper() if len(sys.argv) > 3 else None
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        make_db(path)
+        print(f"{threads} threads x {writes} writes, "
+              f"synchronous={write_queue.WRITER_SYNCHRONOUS or 'FULL (default)'}\n")
+    
+        run('per-request commit', threads, writes, lambda: per_request_commit(path))
+    
+        writer = write_queue.WriteQueue(db_path=path)
+        run('group commit queue', threads, writes, lambda: writer.execute(insert_session))
+        writer.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Checks for the bulk user import: bad rows are reported one by one and
+never abort the rest of their batch. Run from backend/:
+
+    python bulk_import_checks.py
+"""
+import os
+import tempfile
+
+import database
+
+STRONG_PASSWORD = 'Str0ng!Pass'
+
+def _import(app, records):
+    return app.import_user_batch(list(enumerate(records, start=1)))
+
+def check_valid_rows_created(app):
+    results = _import(app, [
+        {'username': 'ann', 'email': 'ann@x.io', 'password': STRONG_PASSWORD},
+        {'username': 'bob', 'email': 'bob@x.io', 'password': STRONG_PASSWORD, 'role': 'organizer'}
+    ])
+    assert [r['status'] for r in results] == ['created', 'created']
+
+def check_bad_rows_reported(app):
+    """Non-string fields, malformed and duplicate rows next to a good one"""
+    results = _import(app, [
+        {'username': 'cat', 'email': 'cat@x.io', 'password': 12345678},
+        {'username': 'dan', 'email': ['dan@x.io'], 'password': STRONG_PASSWORD},
+        {'username': {'name': 'eve'}, 'email': 'eve@x.io', 'password': STRONG_PASSWORD},
+        None,
+        {'username': 'ann', 'email': 'ann2@x.io', 'password': STRONG_PASSWORD},
+        {'username': 'fay', 'email': 'fay@x.io', 'password': STRONG_PASSWORD, 'role': 'root'},
+        {'username': 'gus', 'email': 'gus@x.io', 'password': STRONG_PASSWORD}
+    ])
+    assert [r['row'] for r in results] == list(range(1, 8))
+    assert [r['status'] for r in results] == ['error'] * 6 + ['created']
+    
+    # The good row's batch was committed despite the bad ones
+    conn = database.get_db_connection()
+    try:
+        assert conn.execute("SELECT 1 FROM users WHERE username = 'gus'").fetchone()
+    finally:
+        conn.close()
+
+CHECKS = [
+    check_valid_rows_created,
+    check_bad_rows_reported,
+]
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, 'import.db')
+        database.ARCHIVE_DATABASE = os.path.join(tmp, 'import_archive.db')
+        database.init_db()
+        import app
+        for check in CHECKS:
+            check(app)
+            print(f'  ✓ {check.__name__}')
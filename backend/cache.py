@@ -0,0 +1,375 @@
+import hashlib
+import json
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Two-level cache shared by every backend process.
+# L1 is a small per-process LRU, L2 a shared store speaking the Redis
+# protocol (redis-py, optional). Writers call invalidate(): the keys are
+# deleted from L2 and an invalidation message is published so every
+# process drops them from its L1 as well. Without REDIS_URL an in-process
+# stand-in is used (single process / tests).
+#
+# A load that is still running when its key is invalidated must not write
+# its (now stale) value back: invalidate() replaces a per-key version in
+# L2, and a load only stores its result if the version it saw before
+# calling the loader is unchanged (WATCH/MULTI). L1 keeps tombstones for
+# the same purpose.
+
+try:
+    import redis
+    WatchError = redis.WatchError
+except ImportError:
+    redis = None
+    
+    class WatchError(Exception):
+        """A watched key changed before EXEC (as redis.WatchError)"""
+
+# Shared store, e.g. 'redis://localhost:6379/0' (None = in-process stand-in)
+REDIS_URL = None
+# Entries kept in each process's LRU
+LOCAL_CACHE_SIZE = 1024
+# Seconds an L1 entry lives; bounds staleness if an invalidation is missed
+LOCAL_TTL = 5
+# Seconds an L2 entry lives
+SHARED_TTL = 60
+# How long other replicas wait for the one process loading a hot key
+LOAD_LOCK_TTL = 5
+# Seconds a key's version outlives its last invalidation; must exceed
+# the longest load
+VERSION_TTL = 3600
+INVALIDATION_CHANNEL = 'cache:invalidate'
+KEY_PREFIX = 'cache:'
+
+_MISSING = object()
+
+# Keys for the cached data, shared by readers and invalidating writers
+EVENTS_LIST_KEY = 'events:list'
+
+def session_key(session_token):
+    # Tokens are credentials: only their hash goes to the shared store
+    return 'session:' + hashlib.sha256(session_token.encode('utf-8')).hexdigest()
+
+def certificate_key(certificate_id):
+    return 'certificate:' + certificate_id
+
+class LocalLRU:
+    """
+    Thread-safe LRU with per-entry expiry.
+    delete() leaves a tombstone so set(..., since=clock()) can refuse a
+    value that was loaded before the key was deleted
+    """
+    
+    def __init__(self, size=LOCAL_CACHE_SIZE, ttl=LOCAL_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tombstones = OrderedDict()
+        # Deletions so far; a forgotten tombstone counts as the latest
+        # one dropped, so old loads stay refused
+        self._clock = 0
+        self._forgotten = 0
+        self._lock = threading.Lock()
+    
+    def clock(self):
+        with self._lock:
+            return self._clock
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value, since=None):
+        with self._lock:
+            if since is not None and self._tombstones.get(key, self._forgotten) > since:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+    
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._clock += 1
+                self._tombstones[key] = self._clock
+                self._tombstones.move_to_end(key)
+            while len(self._tombstones) > self.size:
+                _, self._forgotten = self._tombstones.popitem(last=False)
+
+class MemoryStore:
+    """
+    In-process stand-in for the Redis commands the cache uses
+    (GET, SET with EX/NX, DEL, PUBLISH, SUBSCRIBE, WATCH/MULTI/EXEC)
+    """
+    
+    def __init__(self):
+        self._data = {}
+        self._channels = {}
+        self._lock = threading.Lock()
+    
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[name]
+                return None
+            return value
+    
+    def set(self, name, value, ex=None, nx=False):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        with self._lock:
+            if nx and name in self._data:
+                _, expires = self._data[name]
+                if expires is None or expires >= time.monotonic():
+                    return None
+            self._data[name] = (value, time.monotonic() + ex if ex else None)
+            return True
+    
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+    
+    def publish(self, channel, message):
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        with self._lock:
+            listeners = list(self._channels.get(channel, ()))
+        for listener in listeners:
+            listener.put({'type': 'message', 'channel': channel, 'data': message})
+        return len(listeners)
+    
+    def pubsub(self):
+        return MemoryPubSub(self)
+    
+    def pipeline(self):
+        return MemoryPipeline(self)
+
+class MemoryPipeline:
+    """WATCH, then GET right away; after multi(), SETs are queued for execute()"""
+    
+    def __init__(self, store):
+        self.store = store
+        self._watched = {}
+        self._commands = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.reset()
+    
+    def watch(self, *names):
+        for name in names:
+            self._watched[name] = self.store.get(name)
+    
+    def get(self, name):
+        return self.store.get(name)
+    
+    def multi(self):
+        self._commands = []
+    
+    def set(self, name, value, ex=None, nx=False):
+        self._commands.append((name, value, ex, nx))
+    
+    def execute(self):
+        # Check and apply under the store lock, as EXEC is atomic
+        with self.store._lock:
+            for name, seen in self._watched.items():
+                entry = self.store._data.get(name)
+                current = None
+                if entry is not None and (entry[1] is None or entry[1] >= time.monotonic()):
+                    current = entry[0]
+                if current != seen:
+                    raise WatchError(f'watched key {name!r} changed')
+            for name, value, ex, _ in self._commands:
+                if isinstance(value, str):
+                    value = value.encode('utf-8')
+                self.store._data[name] = (value, time.monotonic() + ex if ex else None)
+        results = [True] * len(self._commands)
+        self.reset()
+        return results
+    
+    def reset(self):
+        self._watched = {}
+        self._commands = []
+
+class MemoryPubSub:
+    def __init__(self, store):
+        self.store = store
+        self.queue = queue.Queue()
+    
+    def subscribe(self, channel):
+        with self.store._lock:
+            self.store._channels.setdefault(channel, []).append(self.queue)
+    
+    def listen(self):
+        while True:
+            yield self.queue.get()
+
+class SingleFlight:
+    """Collapse concurrent loads of the same key into one call"""
+    
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key, loader):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            future.set_result(loader())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+class TwoLevelCache:
+    """
+    get_or_load() checks the local LRU, then the shared store, then
+    runs the loader once per key: single-flight within the process and
+    a short SET NX lock across replicas, so a hot key that expires
+    (e.g. the events list) costs one database query, not one per request.
+    Values must be JSON-serializable. A None result is cached unless
+    cache_none=False (e.g. for lookups keyed by untrusted input).
+    invalidate() wins over loads already in progress: their result is
+    returned to their callers but not cached at either level.
+    """
+    
+    def __init__(self, store, local_size=LOCAL_CACHE_SIZE, local_ttl=LOCAL_TTL,
+                 shared_ttl=SHARED_TTL):
+        self.store = store
+        self.local = LocalLRU(local_size, local_ttl)
+        self.shared_ttl = shared_ttl
+        self._flight = SingleFlight()
+        self._listener = None
+    
+    def start(self):
+        """Start listening for invalidations published by other processes"""
+        if self._listener is None:
+            pubsub = self.store.pubsub()
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            self._listener = threading.Thread(target=self._listen, args=(pubsub,),
+                                              name='cache-invalidation', daemon=True)
+            self._listener.start()
+    
+    def _listen(self, pubsub):
+        for message in pubsub.listen():
+            if message['type'] == 'message':
+                self.local.delete(*json.loads(message['data']))
+    
+    def _get_shared(self, key):
+        raw = self.store.get(KEY_PREFIX + key)
+        return _MISSING if raw is None else json.loads(raw)
+    
+    def _set_shared(self, key, value, ttl, version):
+        """SET the loaded value unless the key was invalidated since version was read"""
+        version_key = KEY_PREFIX + 'version:' + key
+        with self.store.pipeline() as pipe:
+            try:
+                pipe.watch(version_key)
+                if pipe.get(version_key) != version:
+                    return False
+                pipe.multi()
+                pipe.set(KEY_PREFIX + key, json.dumps(value, default=str), ex=ttl or self.shared_ttl)
+                pipe.execute()
+            except WatchError:
+                return False
+        return True
+    
+    def _load(self, key, loader, ttl, cache_none):
+        """(value, whether it may be cached locally)"""
+        # Read before the value: an invalidation after this point changes it
+        version = self.store.get(KEY_PREFIX + 'version:' + key)
+        value = self._get_shared(key)
+        if value is not _MISSING:
+            return value, True
+        
+        # Another replica already loading this key: give it a moment
+        lock_key = KEY_PREFIX + 'lock:' + key
+        locked = self.store.set(lock_key, b'1', ex=LOAD_LOCK_TTL, nx=True)
+        if not locked:
+            deadline = time.monotonic() + LOAD_LOCK_TTL
+            while time.monotonic() < deadline:
+                time.sleep(0.01)
+                value = self._get_shared(key)
+                if value is not _MISSING:
+                    return value, True
+        
+        try:
+            value = loader()
+            fresh = True
+            if value is not None or cache_none:
+                fresh = self._set_shared(key, value, ttl, version)
+        finally:
+            if locked:
+                self.store.delete(lock_key)
+        return value, fresh
+    
+    def get_or_load(self, key, loader, ttl=None, cache_none=True):
+        value = self.local.get(key)
+        if value is _MISSING:
+            since = self.local.clock()
+            value, fresh = self._flight.do(key, lambda: self._load(key, loader, ttl, cache_none))
+            if fresh and (value is not None or cache_none):
+                self.local.set(key, value, since=since)
+        return value
+    
+    def invalidate(self, *keys):
+        """Drop keys everywhere: this process, the shared store, other processes"""
+        # New versions first, so loads already running can't store their result
+        for key in keys:
+            self.store.set(KEY_PREFIX + 'version:' + key, secrets.token_hex(8), ex=VERSION_TTL)
+        self.local.delete(*keys)
+        self.store.delete(*(KEY_PREFIX + key for key in keys))
+        self.store.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Process-wide cache, connected on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            if REDIS_URL:
+                if redis is None:
+                    raise RuntimeError('REDIS_URL is set but redis is not installed: pip install redis')
+                store = redis.Redis.from_url(REDIS_URL)
+            else:
+                store = MemoryStore()
+            _cache = TwoLevelCache(store)
+            _cache.start()
+    return _cache
+
+def get_or_load(key, loader, ttl=None, cache_none=True):
+    return get_cache().get_or_load(key, loader, ttl, cache_none)
+
+def invalidate(*keys):
+    get_cache().invalidate(*keys)
@@ -0,0 +1,96 @@
+"""
+Checks for the two-level cache, in particular invalidations racing
+loads that are already running. Run from backend/:
+
+    python cache_checks.py                             # in-process store
+    python cache_checks.py redis://localhost:6379/15   # + Redis (flushes that db)
+"""
+import sys
+import threading
+
+import cache
+
+def _start_blocked_load(c, key, value):
+    """Start get_or_load() in a thread whose loader waits until released"""
+    started = threading.Event()
+    release = threading.Event()
+    result = {}
+    
+    def loader():
+        started.set()
+        release.wait(5)
+        return value
+    
+    def run():
+        result['value'] = c.get_or_load(key, loader)
+    
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert started.wait(5)
+    return thread, release, result
+
+def check_load_and_invalidate(c):
+    key = 'check:basic'
+    assert c.get_or_load(key, lambda: 1) == 1
+    assert c.get_or_load(key, lambda: 2) == 1
+    c.invalidate(key)
+    assert c.get_or_load(key, lambda: 3) == 3
+
+def check_revoke_during_load(c):
+    """A session lookup started before logout must not be cached after it"""
+    key = cache.session_key('token-revoked-during-load')
+    thread, release, result = _start_blocked_load(c, key, {'user_id': 1})
+    
+    c.invalidate(key)
+    release.set()
+    thread.join(5)
+    
+    # The caller that started before the revoke still gets its value...
+    assert result['value'] == {'user_id': 1}
+    # ...but neither level keeps it
+    assert c.local.get(key) is cache._MISSING
+    assert c._get_shared(key) is cache._MISSING
+    assert c.get_or_load(key, lambda: None, cache_none=False) is None
+
+def check_create_during_load(c):
+    """A list loaded before a write must not hide the write for SHARED_TTL"""
+    thread, release, _ = _start_blocked_load(c, cache.EVENTS_LIST_KEY, [])
+    
+    c.invalidate(cache.EVENTS_LIST_KEY)
+    release.set()
+    thread.join(5)
+    
+    assert c.get_or_load(cache.EVENTS_LIST_KEY, lambda: [{'id': 1}]) == [{'id': 1}]
+
+def check_local_tombstones_bounded(c):
+    """Forgotten tombstones still refuse values loaded before them"""
+    lru = cache.LocalLRU(size=2, ttl=60)
+    since = lru.clock()
+    lru.delete('a', 'b', 'c')
+    lru.set('a', 1, since=since)
+    assert lru.get('a') is cache._MISSING
+    lru.set('a', 1, since=lru.clock())
+    assert lru.get('a') == 1
+
+CHECKS = [
+    check_load_and_invalidate,
+    check_revoke_during_load,
+    check_create_during_load,
+    check_local_tombstones_bounded,
+]
+
+def run_checks(store):
+    c = cache.TwoLevelCache(store)
+    c.start()
+    for check in CHECKS:
+        check(c)
+        print(f'  ✓ {check.__name__}')
+
+if __name__ == '__main__':
+    print('MemoryStore')
+    run_checks(cache.MemoryStore())
+    if len(sys.argv) > 1:
+        print('Redis')
+        store = cache.redis.Redis.from_url(sys.argv[1])
+        store.flushdb()
+        run_checks(store)
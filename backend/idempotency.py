@@ -0,0 +1,120 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import jsonify, make_response, request
+
+# Idempotency-Key support for mutating endpoints.
+# The first request with a given key runs normally and its response is
+# kept; retries with the same key get that response back without running
+# auth, queries or writes again, and concurrent duplicates wait for the
+# original to finish instead of racing it to the database.
+#
+# Keys are scoped to the caller's session token and the endpoint, so one
+# client can't replay another's response. The store is per process.
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+# Responses remembered (least recently used are dropped first)
+MAX_ENTRIES = 10000
+# Seconds a response is replayed for
+ENTRY_TTL = 3600
+# Seconds a duplicate waits for the in-flight original
+WAIT_TIMEOUT = 30
+MAX_KEY_LENGTH = 255
+
+class Entry:
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.expires = time.monotonic() + ENTRY_TTL
+        self.response = None
+        self.done = threading.Event()
+
+class IdempotencyStore:
+    """Bounded LRU of request fingerprints and their (in-flight or final) responses"""
+    
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def begin(self, scope, fingerprint):
+        """Returns (entry, True) if the caller should run the request itself"""
+        with self._lock:
+            entry = self._entries.get(scope)
+            if entry is not None and entry.expires < time.monotonic():
+                del self._entries[scope]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(scope)
+                return entry, False
+    
+            entry = self._entries[scope] = Entry(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry, True
+    
+    def complete(self, entry, status, body, content_type):
+        entry.response = (status, body, content_type)
+        entry.done.set()
+    
+    def abandon(self, scope, entry):
+        """Forget a request that failed, so a retry runs it again"""
+        with self._lock:
+            if self._entries.get(scope) is entry:
+                del self._entries[scope]
+        entry.done.set()
+
+store = IdempotencyStore()
+
+def _replay(entry):
+    status, body, content_type = entry.response
+    response = make_response(body, status)
+    response.content_type = content_type
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotent(view):
+    """
+    Honour an Idempotency-Key header on a view. Requests without the
+    header are passed straight through. 5xx responses and exceptions are
+    not remembered (retrying those should run the request again).
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} is too long'}), 400
+    
+        scope = hashlib.sha256('\0'.join([
+            request.headers.get('Authorization', ''), request.method, request.path, key
+        ]).encode('utf-8')).hexdigest()
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+    
+        while True:
+            entry, leader = store.begin(scope, fingerprint)
+            if leader:
+                break
+            if entry.fingerprint != fingerprint:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+            if not entry.done.wait(WAIT_TIMEOUT):
+                return jsonify({'error': 'The original request is still in progress'}), 409
+            if entry.response is not None:
+                return _replay(entry)
+            # The original failed: try again (possibly as the new leader)
+    
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            store.abandon(scope, entry)
+            raise
+    
+        if response.status_code >= 500 or response.is_streamed:
+            store.abandon(scope, entry)
+        else:
+            store.complete(entry, response.status_code, response.get_data(), response.content_type)
+        return response
+    
+    return wrapper
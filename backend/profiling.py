@@ -0,0 +1,178 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import g, request
+
+# Opt-in per-request profiling.
+# A profiled request gets a sampler thread that snapshots the handler
+# thread's stack every SAMPLE_INTERVAL seconds; the samples are written as
+# collapsed stacks ("root;caller;callee count", the input format of
+# flamegraph.pl / speedscope) to PROFILE_DIR/<route>/. Requests that are
+# not profiled only pay for one header lookup and one random().
+#
+# Stacks are read with sys._current_frames(), so this profiles the
+# threaded server (app.run / gunicorn threads), not gevent greenlets.
+# A streamed response is profiled until its body has been sent, since that
+# is where the serialization, compression and rendering happen.
+
+# Request header an admin sends to profile that request
+PROFILE_HEADER = 'X-Profile'
+# Fraction of all requests profiled automatically (0 = off, 0.01 = 1%)
+SAMPLE_RATE = 0.0
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.002
+PROFILE_DIR = 'profiles'
+# Profiles kept per route; older ones are deleted
+MAX_PROFILES_PER_ROUTE = 50
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread"""
+    
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+    
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+def collapse_stack(frame):
+    """Frame chain as 'outermost;...;innermost' with 'function (file:line)' entries"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+                     .replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+def _safe_name(text):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', text)
+
+def _should_profile(is_admin):
+    if request.headers.get(PROFILE_HEADER):
+        # Only admins may force a profile; others are silently ignored
+        return is_admin()
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+def _prune(route_dir):
+    profiles = sorted(f for f in os.listdir(route_dir) if f.endswith('.folded'))
+    for old in profiles[:-MAX_PROFILES_PER_ROUTE]:
+        for ext in ('.folded', '.json'):
+            try:
+                os.remove(os.path.join(route_dir, old[:-len('.folded')] + ext))
+            except FileNotFoundError:
+                pass
+
+def profile_name(started):
+    return f"{datetime.fromtimestamp(started).strftime('%Y%m%dT%H%M%S')}-{os.urandom(3).hex()}"
+
+def save_profile(sampler, route, name, trigger, started, duration, status, method, path):
+    """
+    Write the collapsed stacks plus a small metadata file. Takes no
+    request context, so it can run after a streamed body was sent
+    """
+    route_dir = os.path.join(PROFILE_DIR, _safe_name(route))
+    os.makedirs(route_dir, exist_ok=True)
+    
+    with open(os.path.join(route_dir, name + '.folded'), 'w') as f:
+        f.write(sampler.collapsed())
+    with open(os.path.join(route_dir, name + '.json'), 'w') as f:
+        json.dump({
+            'route': _safe_name(route),
+            'name': name,
+            'method': method,
+            'path': path,
+            'status': status,
+            'trigger': trigger,
+            'duration_ms': round(duration * 1000, 2),
+            'samples': sum(sampler.stacks.values()),
+            'created_at': datetime.fromtimestamp(started).isoformat()
+        }, f)
+    
+    _prune(route_dir)
+
+def list_profiles(route=None, limit=50):
+    """Metadata of the most recent profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    routes = [_safe_name(route)] if route else os.listdir(PROFILE_DIR)
+    profiles = []
+    for route_name in routes:
+        route_dir = os.path.join(PROFILE_DIR, route_name)
+        if not os.path.isdir(route_dir):
+            continue
+        for filename in os.listdir(route_dir):
+            if filename.endswith('.json'):
+                with open(os.path.join(route_dir, filename)) as f:
+                    profiles.append(json.load(f))
+    profiles.sort(key=lambda p: p['created_at'], reverse=True)
+    return profiles[:limit]
+
+def init_app(app, is_admin):
+    """
+    Install the profiling hooks on an app.
+    is_admin() is called (only when the profiling header is present)
+    to check that the current request comes from an admin.
+    """
+    @app.before_request
+    def start_profiling():
+        if not _should_profile(is_admin):
+            return
+        g.profiler = StackSampler(threading.get_ident())
+        g.profile_trigger = 'header' if request.headers.get(PROFILE_HEADER) else 'sampled'
+        g.profile_started = time.time()
+        g.profiler.start()
+    
+    @app.after_request
+    def stop_profiling(response):
+        sampler = g.pop('profiler', None)
+        if sampler is None:
+            return response
+        route = request.endpoint or 'unknown'
+        started = g.pop('profile_started')
+        name = profile_name(started)
+        trigger = g.pop('profile_trigger')
+        status = response.status_code
+        method, path = request.method, request.path
+        
+        def finish():
+            sampler.stop()
+            save_profile(sampler, route, name, trigger, started, time.time() - started,
+                         status, method, path)
+        
+        # A streamed body is produced after this hook: save once it is sent
+        if response.is_streamed:
+            response.call_on_close(finish)
+        else:
+            finish()
+        response.headers['X-Profile-Id'] = f'{_safe_name(route)}/{name}'
+        return response
+    
+    @app.teardown_request
+    def discard_profiling(exc):
+        # after_request is skipped when the view raised: don't leak the sampler
+        sampler = g.pop('profiler', None)
+        if sampler is not None:
+            sampler.stop()
@@ -0,0 +1,394 @@
+import sqlite3
+
+# Repository layer: all SQL for users, events, registrations, certificates
+# and sessions lives here, behind small per-table classes.
+#
+# A repo wraps anything with .execute() (a connection or a cursor), so the
+# same code runs on a pooled read connection, on a write-queue cursor or on
+# a PostgreSQL connection. SQL is written once with "?" placeholders; the
+# dialect adapts placeholders and inserted-id retrieval per backend.
+#
+# List queries also come as *_cursor() methods returning an executed
+# cursor of plain tuples, which responses.stream_query() streams without
+# building the row list; the *_cursor() methods are what a backend
+# overrides when its SQL differs.
+
+class SqliteDialect:
+    name = 'sqlite'
+    
+    def sql(self, statement):
+        return statement
+    
+    def insert(self, db, statement, params):
+        """Run an INSERT and return the new row id"""
+        return db.execute(statement, params).lastrowid
+    
+    def execute(self, db, statement, params=()):
+        return db.execute(statement, params)
+    
+    def tuple_cursor(self, db, statement, params=()):
+        """Run a query on a fresh cursor whose rows are plain tuples"""
+        conn = db.connection if isinstance(db, sqlite3.Cursor) else db
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        return cursor.execute(statement, params)
+
+SQLITE = SqliteDialect()
+
+def _row(row):
+    return dict(row) if row is not None else None
+
+class Repo:
+    def __init__(self, db, dialect=SQLITE):
+        self.db = db
+        self.dialect = dialect
+    
+    def _execute(self, statement, params=()):
+        return self.dialect.execute(self.db, self.dialect.sql(statement), params)
+    
+    def _insert(self, statement, params):
+        return self.dialect.insert(self.db, self.dialect.sql(statement), params)
+    
+    def _one(self, statement, params=()):
+        return _row(self._execute(statement, params).fetchone())
+    
+    def _all(self, statement, params=()):
+        return self.records(self._cursor(statement, params))
+    
+    def _cursor(self, statement, params=()):
+        return self.dialect.tuple_cursor(self.db, self.dialect.sql(statement), params)
+    
+    @staticmethod
+    def records(cursor):
+        """A tuple cursor's rows as dicts sharing one column header"""
+        header = [column[0] for column in cursor.description]
+        return [dict(zip(header, row)) for row in cursor]
+
+class UsersRepo(Repo):
+    # All users without credentials
+    LIST_SQL = 'SELECT id, username, email, role, created_at FROM users'
+    
+    def create(self, username, email, password_hash, salt, role, totp_secret):
+        return self._insert('''
+            INSERT INTO users (username, email, password_hash, salt, role, totp_secret)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (username, email, password_hash, salt, role, totp_secret))
+    
+    def get_by_username(self, username):
+        return self._one('''
+            SELECT id, username, email, password_hash, role, totp_secret,
+                   failed_attempts, locked_until
+            FROM users WHERE username = ?
+        ''', (username,))
+    
+    def get_by_id(self, user_id):
+        return self._one('SELECT id, username, email, role FROM users WHERE id = ?', (user_id,))
+    
+    def list_all_cursor(self):
+        return self._cursor(self.LIST_SQL)
+    
+    def list_all(self):
+        return self.records(self.list_all_cursor())
+    
+    def increment_failed_attempts(self, username, lock_after, locked_until):
+        """Count a failed login; lock the account once lock_after is reached"""
+        self._execute('''
+            UPDATE users SET failed_attempts = failed_attempts + 1 WHERE username = ?
+        ''', (username,))
+    
+        user = self._one('SELECT failed_attempts FROM users WHERE username = ?', (username,))
+    
+        if user and user['failed_attempts'] >= lock_after:
+            self._execute('''
+                UPDATE users SET locked_until = ? WHERE username = ?
+            ''', (locked_until, username))
+    
+    def reset_failed_attempts(self, username):
+        self._execute('''
+            UPDATE users SET failed_attempts = 0, locked_until = NULL WHERE username = ?
+        ''', (username,))
+
+class EventsRepo(Repo):
+    # All events with organizer name, newest first (no key material)
+    LIST_SQL = '''
+        SELECT e.id, e.name, e.description, e.date, e.organizer_id, e.max_capacity,
+               e.created_at, u.username as organizer_name
+        FROM events e
+        JOIN users u ON e.organizer_id = u.id
+        ORDER BY e.date DESC
+    '''
+    
+    def create(self, name, description, date, organizer_id, max_capacity,
+               encrypted_details, encryption_key):
+        return self._insert('''
+            INSERT INTO events (name, description, date, organizer_id, max_capacity,
+                              encrypted_details, encryption_key)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (name, description, date, organizer_id, max_capacity,
+              encrypted_details, encryption_key))
+    
+    def get(self, event_id):
+        return self._one('SELECT * FROM events WHERE id = ?', (event_id,))
+    
+    def list_all_cursor(self):
+        return self._cursor(self.LIST_SQL)
+    
+    def list_all(self):
+        return self.records(self.list_all_cursor())
+    
+    @staticmethod
+    def build_fts_query(text):
+        """
+        Turn free-form user input into a safe FTS5 MATCH expression.
+        Each term is quoted (so FTS5 operators are treated as text) and
+        the last term gets a prefix match for search-as-you-type.
+        """
+        terms = [t.replace('"', '""') for t in text.split() if t.strip('"')]
+        if not terms:
+            return None
+        quoted = [f'"{t}"' for t in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+    
+    def search(self, text, date_from=None, date_to=None, limit=20, offset=0):
+        """
+        Full-text search over name and description, best match first.
+        Returns None if the query has no searchable terms.
+        """
+        match = self.build_fts_query(text)
+        if match is None:
+            return None
+    
+        # Rank inside the FTS index first and join only the page to events
+        # and users; the date filter needs events, but only its date
+        join = ''
+        where = ['events_fts MATCH ?']
+        params = [match]
+        if date_from or date_to:
+            join = 'JOIN events d ON d.id = events_fts.rowid'
+        if date_from:
+            where.append('d.date >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('d.date <= ?')
+            params.append(date_to)
+    
+        # bm25 weights: matches in the name count more than in the description
+        return self._all(f'''
+            SELECT e.id, e.name, e.description, e.date, e.organizer_id, e.max_capacity,
+                   e.created_at, u.username as organizer_name, m.score
+            FROM (
+                SELECT events_fts.rowid AS id, bm25(events_fts, 10.0, 1.0) AS score
+                FROM events_fts {join}
+                WHERE {' AND '.join(where)}
+                ORDER BY score
+                LIMIT ? OFFSET ?
+            ) m
+            JOIN events e ON e.id = m.id
+            JOIN users u ON e.organizer_id = u.id
+            ORDER BY m.score, e.date DESC
+        ''', (*params, limit, offset))
+
+class RegistrationsRepo(Repo):
+    # A student's registrations with event name and date, newest first
+    STUDENT_SQL = '''
+        SELECT r.id, r.student_id, r.event_id, r.status, r.attendance_marked, r.registered_at,
+               e.name as event_name, e.date as event_date
+        FROM registrations r
+        JOIN events e ON r.event_id = e.id
+        WHERE r.student_id = ?
+        ORDER BY r.registered_at DESC
+    '''
+    
+    # Same, including registrations moved to the ATTACHed archive (SQLite)
+    STUDENT_HISTORY_SQL = '''
+        SELECT r.id, r.student_id, r.event_id, r.status, r.attendance_marked, r.registered_at,
+               e.name as event_name, e.date as event_date
+        FROM main.registrations r
+        JOIN main.events e ON r.event_id = e.id
+        WHERE r.student_id = ?
+        UNION ALL
+        SELECT r.id, r.student_id, r.event_id, r.status, r.attendance_marked, r.registered_at,
+               e.name as event_name, e.date as event_date
+        FROM archive.registrations r
+        JOIN archive.events e ON r.event_id = e.id
+        WHERE r.student_id = ? AND r.id NOT IN (SELECT id FROM main.registrations)
+        ORDER BY registered_at DESC
+    '''
+    
+    # Registrations for one event with student name and email
+    EVENT_SQL = '''
+        SELECT r.id, r.student_id, r.event_id, r.status, r.attendance_marked, r.registered_at,
+               u.username as student_name, u.email as student_email
+        FROM registrations r
+        JOIN users u ON r.student_id = u.id
+        WHERE r.event_id = ?
+    '''
+    
+    def create(self, student_id, event_id, status='approved'):
+        return self._insert('''
+            INSERT INTO registrations (student_id, event_id, status)
+            VALUES (?, ?, ?)
+        ''', (student_id, event_id, status))
+    
+    def get_with_event(self, registration_id):
+        return self._one('''
+            SELECT r.id, r.student_id, r.event_id, r.status, r.attendance_marked, r.registered_at,
+                   e.name as event_name, e.date as event_date
+            FROM registrations r
+            JOIN events e ON r.event_id = e.id
+            WHERE r.id = ?
+        ''', (registration_id,))
+    
+    def get_attended(self, registration_id):
+        """Registration with student and event names, only if attendance is marked"""
+        return self._one('''
+            SELECT r.*, u.username as student_name, e.name as event_name, e.date as event_date
+            FROM registrations r
+            JOIN users u ON r.student_id = u.id
+            JOIN events e ON r.event_id = e.id
+            WHERE r.id = ? AND r.attendance_marked = 1
+        ''', (registration_id,))
+    
+    def list_for_student(self, student_id):
+        return self._all(self.STUDENT_SQL, (student_id,))
+    
+    def list_history_for_student_cursor(self, student_id):
+        return self._cursor(self.STUDENT_HISTORY_SQL, (student_id, student_id))
+    
+    def list_history_for_student(self, student_id):
+        return self.records(self.list_history_for_student_cursor(student_id))
+    
+    def list_for_event_cursor(self, event_id):
+        return self._cursor(self.EVENT_SQL, (event_id,))
+    
+    def list_for_event(self, event_id):
+        return self.records(self.list_for_event_cursor(event_id))
+    
+    def mark_attendance(self, registration_id):
+        """Mark attendance; returns the registration's student/event ids or None"""
+        self._execute('''
+            UPDATE registrations SET attendance_marked = 1 WHERE id = ?
+        ''', (registration_id,))
+        return self._one('SELECT student_id, event_id FROM registrations WHERE id = ?',
+                         (registration_id,))
+
+class CertificatesRepo(Repo):
+    # Certificates issued for a student's registrations
+    STUDENT_SQL = '''
+        SELECT c.id, c.registration_id, c.certificate_id, c.student_name, c.event_name,
+               c.event_date, c.digital_signature, c.qr_code_path, c.issued_at
+        FROM certificates c
+        JOIN registrations r ON c.registration_id = r.id
+        WHERE r.student_id = ?
+    '''
+    
+    # Same, including certificates moved to the ATTACHed archive (SQLite)
+    STUDENT_HISTORY_SQL = '''
+        SELECT c.id, c.registration_id, c.certificate_id, c.student_name, c.event_name,
+               c.event_date, c.digital_signature, c.qr_code_path, c.issued_at
+        FROM main.certificates c
+        JOIN main.registrations r ON c.registration_id = r.id
+        WHERE r.student_id = ?
+        UNION ALL
+        SELECT c.id, c.registration_id, c.certificate_id, c.student_name, c.event_name,
+               c.event_date, c.digital_signature, c.qr_code_path, c.issued_at
+        FROM archive.certificates c
+        JOIN archive.registrations r ON c.registration_id = r.id
+        WHERE r.student_id = ? AND c.id NOT IN (SELECT id FROM main.certificates)
+    '''
+    
+    def create(self, registration_id, certificate_id, student_name, event_name, event_date,
+               digital_signature, qr_code_path):
+        return self._insert('''
+            INSERT INTO certificates
+            (registration_id, certificate_id, student_name, event_name, event_date,
+             digital_signature, qr_code_path)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (registration_id, certificate_id, student_name, event_name, event_date,
+              digital_signature, qr_code_path))
+    
+    def get_by_certificate_id(self, certificate_id):
+        return self._one('SELECT * FROM certificates WHERE certificate_id = ?', (certificate_id,))
+    
+    def get_with_student(self, certificate_id):
+        """Certificate plus the student it was issued to (hot or archived)"""
+        return self._one('''
+            SELECT c.*, r.student_id
+            FROM main.certificates c
+            JOIN main.registrations r ON c.registration_id = r.id
+            WHERE c.certificate_id = ?
+            UNION ALL
+            SELECT c.*, r.student_id
+            FROM archive.certificates c
+            JOIN archive.registrations r ON c.registration_id = r.id
+            WHERE c.certificate_id = ?
+            LIMIT 1
+        ''', (certificate_id, certificate_id))
+    
+    def list_history_for_event(self, event_id):
+        """Every certificate issued for an event, including archived ones"""
+        return self._all('''
+            SELECT c.* FROM main.certificates c
+            JOIN main.registrations r ON c.registration_id = r.id
+            WHERE r.event_id = ?
+            UNION ALL
+            SELECT c.* FROM archive.certificates c
+            JOIN archive.registrations r ON c.registration_id = r.id
+            WHERE r.event_id = ? AND c.id NOT IN (SELECT id FROM main.certificates)
+            ORDER BY student_name
+        ''', (event_id, event_id))
+    
+    def get_archived(self, certificate_id):
+        """Look a certificate up in the ATTACHed archive (SQLite)"""
+        return self._one('SELECT * FROM archive.certificates WHERE certificate_id = ?',
+                         (certificate_id,))
+    
+    def list_for_student(self, student_id):
+        return self._all(self.STUDENT_SQL, (student_id,))
+    
+    def list_history_for_student_cursor(self, student_id):
+        return self._cursor(self.STUDENT_HISTORY_SQL, (student_id, student_id))
+    
+    def list_history_for_student(self, student_id):
+        return self.records(self.list_history_for_student_cursor(student_id))
+
+class SessionsRepo(Repo):
+    def create(self, user_id, session_token, created_at, expires_at):
+        self._execute('''
+            INSERT INTO sessions (user_id, session_token, created_at, expires_at)
+            VALUES (?, ?, ?, ?)
+        ''', (user_id, session_token, created_at, expires_at))
+    
+    def get(self, session_token):
+        return self._one('''
+            SELECT user_id, expires_at FROM sessions WHERE session_token = ?
+        ''', (session_token,))
+    
+    def delete(self, session_token):
+        self._execute('DELETE FROM sessions WHERE session_token = ?', (session_token,))
+
+class Repos:
+    """All repositories bound to one connection/cursor (one unit of work)"""
+    
+    users_class = UsersRepo
+    events_class = EventsRepo
+    registrations_class = RegistrationsRepo
+    certificates_class = CertificatesRepo
+    sessions_class = SessionsRepo
+    
+    def __init__(self, db, dialect=SQLITE):
+        self.db = db
+        self.users = self.users_class(db, dialect)
+        self.events = self.events_class(db, dialect)
+        self.registrations = self.registrations_class(db, dialect)
+        self.certificates = self.certificates_class(db, dialect)
+        self.sessions = self.sessions_class(db, dialect)
+
+def repos(db):
+    """SQLite repositories over a connection or cursor"""
+    return Repos(db)
+
+# Errors raised for constraint violations (duplicates etc.), per backend
+INTEGRITY_ERRORS = (sqlite3.IntegrityError,)
+DATABASE_ERRORS = (sqlite3.Error,)
@@ -0,0 +1,191 @@
+"""
+Shared conformance checks for repository backends.
+
+Every backend (SQLite, PostgreSQL, or a stand-in) must pass the same
+checks. Run from backend/:
+
+    python repositories_conformance.py                    # SQLite
+    python repositories_conformance.py postgresql://...   # + PostgreSQL
+"""
+import os
+import secrets
+import sqlite3
+import sys
+import tempfile
+
+import database
+import repositories
+import repositories_pg
+
+def _expect_error(errors, action):
+    try:
+        action()
+    except errors:
+        return
+    raise AssertionError('expected a constraint violation')
+
+def check_users(r, errors):
+    user_id = r.users.create('alice', 'alice@x.io', 'hash', 'salt', 'student', 'SECRET')
+    assert r.users.get_by_username('alice')['id'] == user_id
+    assert r.users.get_by_id(user_id)['role'] == 'student'
+    assert r.users.get_by_username('nobody') is None
+    
+    assert all('password_hash' not in u for u in r.users.list_all())
+    
+    for _ in range(3):
+        r.users.increment_failed_attempts('alice', 3, '2099-01-01T00:00:00')
+    locked = r.users.get_by_username('alice')
+    assert locked['failed_attempts'] == 3 and locked['locked_until'] == '2099-01-01T00:00:00'
+    r.users.reset_failed_attempts('alice')
+    assert r.users.get_by_username('alice')['locked_until'] is None
+
+def check_duplicate_user(r, errors):
+    _expect_error(errors, lambda: r.users.create('alice', 'other@x.io', 'h', 's', 'student', None))
+
+def check_events(r, errors):
+    organizer = r.users.create('org', 'org@x.io', 'h', 's', 'organizer', None)
+    first = r.events.create('Python Workshop', 'Learn python basics', '2026-01-10',
+                            organizer, 50, 'enc', 'key')
+    r.events.create('Robotics Meetup', 'Build robots with python', '2026-03-01',
+                    organizer, 20, 'enc', 'key')
+    
+    assert r.events.get(first)['encryption_key'] == 'key'
+    listed = r.events.list_all()
+    assert [e['date'] for e in listed] == ['2026-03-01', '2026-01-10']
+    assert listed[0]['organizer_name'] == 'org' and 'encryption_key' not in listed[0]
+    
+    assert {e['name'] for e in r.events.search('pyth')} == {'Python Workshop', 'Robotics Meetup'}
+    assert [e['name'] for e in r.events.search('python', date_from='2026-02-01')] == ['Robotics Meetup']
+    assert len(r.events.search('python', limit=1)) == 1
+    assert r.events.search('   ') is None
+
+def check_registrations_and_certificates(r, errors):
+    student = r.users.get_by_username('alice')['id']
+    event = r.events.list_all()[0]['id']
+    
+    registration = r.registrations.create(student, event)
+    assert r.registrations.get_with_event(registration)['event_id'] == event
+    assert [x['id'] for x in r.registrations.list_for_student(student)] == [registration]
+    assert r.registrations.list_for_event(event)[0]['student_name'] == 'alice'
+    
+    assert r.registrations.get_attended(registration) is None
+    marked = r.registrations.mark_attendance(registration)
+    assert (marked['student_id'], marked['event_id']) == (student, event)
+    assert r.registrations.get_attended(registration)['student_name'] == 'alice'
+    
+    cert_id = r.certificates.create(registration, 'CERT-1', 'alice', 'Event', '2026-03-01',
+                                    'sig', 'qr.png')
+    assert r.certificates.get_by_certificate_id('CERT-1')['id'] == cert_id
+    assert r.certificates.get_by_certificate_id('CERT-404') is None
+    assert [c['certificate_id'] for c in r.certificates.list_for_student(student)] == ['CERT-1']
+
+def check_history(r, errors):
+    """History lookups (hot + archived rows) with nothing archived yet"""
+    student = r.users.get_by_username('alice')['id']
+    event = r.events.list_all()[0]['id']
+    
+    assert [x['event_id'] for x in r.registrations.list_history_for_student(student)] == [event]
+    assert [c['certificate_id'] for c in r.certificates.list_history_for_student(student)] == ['CERT-1']
+    assert [c['certificate_id'] for c in r.certificates.list_history_for_event(event)] == ['CERT-1']
+    assert r.certificates.list_history_for_event(-1) == []
+    
+    cert = r.certificates.get_with_student('CERT-1')
+    assert cert['student_id'] == student and cert['event_name'] == 'Event'
+    assert r.certificates.get_with_student('CERT-404') is None
+    assert r.certificates.get_archived('CERT-1') is None
+
+def check_duplicate_registration(r, errors):
+    student = r.users.get_by_username('alice')['id']
+    event = r.events.list_all()[0]['id']
+    _expect_error(errors, lambda: r.registrations.create(student, event))
+
+def check_sessions(r, errors):
+    user_id = r.users.get_by_username('alice')['id']
+    token = secrets.token_urlsafe(16)
+    r.sessions.create(user_id, token, '2026-01-01T00:00:00', '2026-01-01T00:30:00')
+    assert r.sessions.get(token)['user_id'] == user_id
+    assert r.sessions.get('missing') is None
+    r.sessions.delete(token)
+    assert r.sessions.get(token) is None
+
+# Checks that leave the transaction aborted (constraint errors) are run in
+# their own transaction and rolled back; the rest build on each other.
+CHECKS = [
+    (check_users, False),
+    (check_duplicate_user, True),
+    (check_events, False),
+    (check_registrations_and_certificates, False),
+    (check_history, False),
+    (check_duplicate_registration, True),
+    (check_sessions, False),
+]
+
+def run_conformance(conn, make_repos, errors):
+    """Run every check against one backend connection; raises on failure"""
+    for check, rollback in CHECKS:
+        if rollback:
+            conn.commit()
+            check(make_repos(conn), errors)
+            conn.rollback()
+        else:
+            check(make_repos(conn), errors)
+            conn.commit()
+        print(f'  ✓ {check.__name__}')
+
+def check_sqlite_archive(conn, archive_path):
+    """SQLite only: archived rows show up in the history lookups"""
+    archive = sqlite3.connect(archive_path)
+    archive.execute("INSERT INTO events (id, name, date, organizer_id) VALUES (900, 'Old', '2020-01-01', 1)")
+    archive.execute("INSERT INTO registrations (id, student_id, event_id) VALUES (900, 1, 900)")
+    archive.execute('''
+        INSERT INTO certificates (id, registration_id, certificate_id, student_name, event_name,
+                                  event_date, digital_signature)
+        VALUES (900, 900, 'CERT-OLD', 'alice', 'Old', '2020-01-01', 'sig')
+    ''')
+    archive.commit()
+    archive.close()
+    
+    r = repositories.repos(conn)
+    assert 900 in [x['event_id'] for x in r.registrations.list_history_for_student(1)]
+    assert 'CERT-OLD' in [c['certificate_id'] for c in r.certificates.list_history_for_student(1)]
+    assert [c['certificate_id'] for c in r.certificates.list_history_for_event(900)] == ['CERT-OLD']
+    assert r.certificates.get_with_student('CERT-OLD')['student_id'] == 1
+    assert r.certificates.get_archived('CERT-OLD')['event_name'] == 'Old'
+    print(f'  ✓ {check_sqlite_archive.__name__}')
+
+def run_sqlite():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conformance.db')
+        archive_path = os.path.join(tmp, 'conformance_archive.db')
+        database.init_db(path, archive_path)
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        # As on the pooled read connections
+        conn.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+        try:
+            run_conformance(conn, repositories.repos, repositories.INTEGRITY_ERRORS)
+            check_sqlite_archive(conn, archive_path)
+        finally:
+            conn.close()
+
+def run_postgres(conninfo):
+    pool = repositories_pg.create_pool(conninfo, min_size=1, max_size=2)
+    schema = f'conformance_{secrets.token_hex(4)}'
+    with pool.connection() as conn:
+        conn.execute(f'CREATE SCHEMA {schema}')
+        conn.execute(f'SET search_path TO {schema}')
+        try:
+            repositories_pg.init_schema(conn)
+            run_conformance(conn, repositories_pg.PgRepos, repositories_pg.INTEGRITY_ERRORS)
+        finally:
+            conn.rollback()
+            conn.execute(f'DROP SCHEMA {schema} CASCADE')
+            conn.commit()
+    pool.close()
+
+if __name__ == '__main__':
+    print('SQLite')
+    run_sqlite()
+    if len(sys.argv) > 1:
+        print('PostgreSQL')
+        run_postgres(sys.argv[1])
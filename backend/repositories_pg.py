@@ -0,0 +1,201 @@
+import repositories
+
+# PostgreSQL implementation of the repository layer for multi-node
+# deployments. Needs psycopg 3 and psycopg_pool (optional dependencies):
+#     pip install "psycopg[binary]" psycopg_pool
+# psycopg prepares statements server-side; passing prepare=True makes
+# every repo statement a named prepared statement from its first use.
+
+try:
+    import psycopg
+    from psycopg.rows import dict_row, tuple_row
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    psycopg = None
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        salt TEXT NOT NULL,
+        role TEXT NOT NULL CHECK(role IN ('student', 'organizer', 'admin')),
+        totp_secret TEXT,
+        failed_attempts INTEGER DEFAULT 0,
+        locked_until TEXT,
+        created_at TEXT DEFAULT to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS events (
+        id SERIAL PRIMARY KEY,
+        name TEXT NOT NULL,
+        description TEXT,
+        date TEXT NOT NULL,
+        organizer_id INTEGER NOT NULL REFERENCES users(id),
+        max_capacity INTEGER,
+        encrypted_details TEXT,
+        encryption_key TEXT,
+        created_at TEXT DEFAULT to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS'),
+        search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_events_search ON events USING GIN (search_vector)',
+    'CREATE INDEX IF NOT EXISTS idx_events_date ON events(date)',
+    '''
+    CREATE TABLE IF NOT EXISTS registrations (
+        id SERIAL PRIMARY KEY,
+        student_id INTEGER NOT NULL REFERENCES users(id),
+        event_id INTEGER NOT NULL REFERENCES events(id),
+        status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'approved', 'rejected')),
+        attendance_marked INTEGER DEFAULT 0,
+        registered_at TEXT DEFAULT to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS'),
+        UNIQUE(student_id, event_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS certificates (
+        id SERIAL PRIMARY KEY,
+        registration_id INTEGER NOT NULL REFERENCES registrations(id),
+        certificate_id TEXT UNIQUE NOT NULL,
+        student_name TEXT NOT NULL,
+        event_name TEXT NOT NULL,
+        event_date TEXT NOT NULL,
+        digital_signature TEXT NOT NULL,
+        qr_code_path TEXT,
+        issued_at TEXT DEFAULT to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS sessions (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users(id),
+        session_token TEXT UNIQUE NOT NULL,
+        created_at TEXT DEFAULT to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS'),
+        expires_at TEXT NOT NULL
+    )
+    '''
+]
+
+class PostgresDialect:
+    name = 'postgres'
+    
+    def __init__(self):
+        self._converted = {}
+    
+    def sql(self, statement):
+        """Convert "?" placeholders to "%s" (cached per statement)"""
+        converted = self._converted.get(statement)
+        if converted is None:
+            converted = statement.replace('%', '%%').replace('?', '%s')
+            self._converted[statement] = converted
+        return converted
+    
+    def insert(self, db, statement, params):
+        return db.execute(statement + ' RETURNING id', params, prepare=True).fetchone()['id']
+    
+    def execute(self, db, statement, params=()):
+        return db.execute(statement, params, prepare=True)
+    
+    def tuple_cursor(self, db, statement, params=()):
+        conn = db.connection if isinstance(db, psycopg.Cursor) else db
+        return conn.cursor(row_factory=tuple_row).execute(statement, params, prepare=True)
+
+POSTGRES = PostgresDialect()
+
+class PgEventsRepo(repositories.EventsRepo):
+    def search(self, text, date_from=None, date_to=None, limit=20, offset=0):
+        """Full-text search using the weighted tsvector column"""
+        terms = text.split()
+        if not terms:
+            return None
+    
+        # Prefix match on every term, the tsquery equivalent of the FTS5 query
+        tsquery = ' & '.join(
+            f"{''.join(ch for ch in term if ch.isalnum())}:*"
+            for term in terms if any(ch.isalnum() for ch in term)
+        )
+        if not tsquery:
+            return None
+    
+        where = ['e.search_vector @@ to_tsquery(\'english\', ?)']
+        params = [tsquery]
+        if date_from:
+            where.append('e.date >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('e.date <= ?')
+            params.append(date_to)
+    
+        return self._all(f'''
+            SELECT e.id, e.name, e.description, e.date, e.organizer_id, e.max_capacity,
+                   e.created_at, u.username as organizer_name,
+                   -ts_rank(e.search_vector, to_tsquery('english', ?)) as score
+            FROM events e
+            JOIN users u ON e.organizer_id = u.id
+            WHERE {' AND '.join(where)}
+            ORDER BY score, e.date DESC
+            LIMIT ? OFFSET ?
+        ''', (tsquery, *params, limit, offset))
+
+# There is no cold tier on PostgreSQL (archive.py moves rows between SQLite
+# files), so the history lookups are the hot-table queries
+
+class PgRegistrationsRepo(repositories.RegistrationsRepo):
+    def list_history_for_student_cursor(self, student_id):
+        return self._cursor(self.STUDENT_SQL, (student_id,))
+
+class PgCertificatesRepo(repositories.CertificatesRepo):
+    def get_with_student(self, certificate_id):
+        return self._one('''
+            SELECT c.*, r.student_id
+            FROM certificates c
+            JOIN registrations r ON c.registration_id = r.id
+            WHERE c.certificate_id = ?
+        ''', (certificate_id,))
+    
+    def list_history_for_event(self, event_id):
+        return self._all('''
+            SELECT c.* FROM certificates c
+            JOIN registrations r ON c.registration_id = r.id
+            WHERE r.event_id = ?
+            ORDER BY c.student_name
+        ''', (event_id,))
+    
+    def get_archived(self, certificate_id):
+        return None
+    
+    def list_history_for_student_cursor(self, student_id):
+        return self._cursor(self.STUDENT_SQL, (student_id,))
+
+class PgRepos(repositories.Repos):
+    events_class = PgEventsRepo
+    registrations_class = PgRegistrationsRepo
+    certificates_class = PgCertificatesRepo
+    
+    def __init__(self, db):
+        super().__init__(db, POSTGRES)
+
+def init_schema(conn):
+    """Create the PostgreSQL schema (idempotent)"""
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+def create_pool(conninfo, min_size=2, max_size=20):
+    """Connection pool whose connections return rows as dicts"""
+    if psycopg is None:
+        raise RuntimeError('PostgreSQL backend needs: pip install "psycopg[binary]" psycopg_pool')
+    return ConnectionPool(conninfo, min_size=min_size, max_size=max_size,
+                          kwargs={'row_factory': dict_row})
+
+if psycopg is not None:
+    INTEGRITY_ERRORS = (psycopg.IntegrityError,)
+    DATABASE_ERRORS = (psycopg.Error,)
+else:
+    INTEGRITY_ERRORS = DATABASE_ERRORS = ()
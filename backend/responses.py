@@ -0,0 +1,186 @@
+import gzip
+import json
+import zlib
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+
+# Optional accelerators: orjson for serialization, brotli for compression.
+# Without them we fall back to the stdlib encoder and gzip.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed (not worth the CPU)
+COMPRESSION_MIN_SIZE = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+# Rows pulled from the cursor and encoded per chunk when streaming
+STREAM_BATCH_SIZE = 500
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/csv'}
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider for jsonify() that uses orjson when installed (several
+    times faster than json.dumps). Repositories hand it plain dicts built
+    against one column header (Repo.records)
+    """
+    
+    def _orjson_options(self):
+        # Datetimes go through default() so output matches Flask's encoder
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+    
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault('default', self.default)
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode('utf-8')
+    
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default,
+                            option=self._orjson_options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def _encode_records(header, rows):
+    """Encode tuple rows as comma-separated JSON objects (no brackets)"""
+    records = [dict(zip(header, row)) for row in rows]
+    if orjson is not None:
+        return orjson.dumps(records)[1:-1]
+    return json.dumps(records, separators=(',', ':'))[1:-1].encode('utf-8')
+
+def stream_query(conn, open_cursor):
+    """
+    Stream a read query's result as a JSON array of objects.
+    open_cursor(conn) runs the query and returns a cursor of plain tuples
+    (a repository *_cursor() method). Rows are read in chunks and encoded
+    against a shared column header, so neither the full row list nor a
+    list of dicts is ever held in memory. Closes conn when the body is
+    exhausted or the response is closed, whichever comes first (a body that
+    is closed before its first chunk never runs the generator's finally).
+    """
+    try:
+        cursor = open_cursor(conn)
+        header = [column[0] for column in cursor.description]
+    except Exception:
+        conn.close()
+        raise
+    
+    released = []
+    
+    def release():
+        if not released:
+            released.append(True)
+            # A half-read SELECT keeps its read transaction (and snapshot)
+            # open, and the pooled connection would carry it to the next request
+            cursor.close()
+            conn.close()
+    
+    def generate():
+        try:
+            yield b'['
+            separator = b''
+            while True:
+                rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                yield separator + _encode_records(header, rows)
+                separator = b','
+            yield b']\n'
+        finally:
+            release()
+    
+    response = Response(generate(), mimetype='application/json')
+    response.call_on_close(release)
+    return response
+
+def choose_encoding(accept_encodings):
+    """Pick the best supported content-coding the client accepts"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def compress_body(data, encoding):
+    """Compress a response body with the given content-coding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+def compress_stream(chunks, encoding):
+    """Compress a streamed body chunk by chunk, flushing after each one"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 = gzip container
+        compress, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            yield compress(chunk) + flush()
+        yield finish()
+    finally:
+        # Make sure the wrapped generator releases its DB connection
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def compress_response(response):
+    """
+    after_request hook: compress eligible responses based on Accept-Encoding.
+    Already-encoded, small and non-text responses are left alone; streamed
+    responses are compressed incrementally.
+    """
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers['Content-Encoding'] = encoding
+        response.headers.pop('Content-Length', None)
+        return response
+    
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return response
+    
+    response.set_data(compress_body(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    
+    # Body bytes differ per coding, so a strong ETag must become weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    
+    return response
+
+def init_app(app):
+    """Install the fast JSON provider and response compression on an app"""
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
@@ -0,0 +1,22 @@
+"""
+Serve the API with gevent so thousands of idle /api/changes (SSE)
+streams cost one greenlet each instead of one OS thread. The write
+queue's transactions still run on a real OS thread (gevent's threadpool),
+so a write waiting on a lock doesn't stall the other greenlets.
+
+Usage:  pip install gevent && python server.py [--warmup]
+Create the schema first with `python database.py`.
+"""
+# Must run before anything imports socket/threading/queue
+from gevent import monkey
+monkey.patch_all()
+
+import sys
+from gevent.pywsgi import WSGIServer
+from app import app, warmup
+
+if __name__ == '__main__':
+    if '--warmup' in sys.argv:
+        warmup()
+    print("🚀 Serving on http://0.0.0.0:5000 (gevent)")
+    WSGIServer(('0.0.0.0', 5000), app).serve_forever()
@@ -0,0 +1,192 @@
+import atexit
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Future
+import database
+
+# Group commit: one writer thread commits queued writes from many
+# requests in a single transaction, instead of one connection + one
+# fsync per request. Every write a request makes to the live database
+# goes through it; only init_db (schema setup, before serving) and the
+# read snapshot copy open their own connections to it.
+
+# How long the writer keeps collecting after the first write of a batch
+GROUP_COMMIT_WINDOW = 0.002
+# Most writes committed together
+MAX_BATCH_SIZE = 256
+# Bound on queued writes; submit() fails fast beyond this
+MAX_QUEUE_DEPTH = 10000
+# How long submit() waits for room in a full queue
+SUBMIT_TIMEOUT = 1.0
+# PRAGMA synchronous for the write connection. None keeps SQLite's default
+# (FULL): a write is durable once its future resolves. 'NORMAL' saves an
+# fsync per commit in WAL mode, but the last commits can be lost on power
+# failure even though their callers were told they committed.
+WRITER_SYNCHRONOUS = None
+
+class WriteQueueFull(Exception):
+    """Raised when the write queue stays full for SUBMIT_TIMEOUT seconds"""
+
+class WriteQueue:
+    """
+    Single-writer queue with group commit.
+    
+    Callers submit a function taking a cursor; it runs on the writer
+    thread inside a shared transaction (isolated by a savepoint, so one
+    failing write does not undo the others) and its return value or
+    exception is delivered through a Future once the batch commits.
+    """
+    
+    def __init__(self, db_path=None, window=GROUP_COMMIT_WINDOW,
+                 max_batch=MAX_BATCH_SIZE, max_depth=MAX_QUEUE_DEPTH):
+        self.db_path = db_path or database.DATABASE
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+    
+    def stop(self):
+        """Flush pending writes and stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+    
+    def submit(self, operation, *args):
+        """Queue operation(cursor, *args); returns a Future with its result"""
+        self.start()
+        future = Future()
+        try:
+            self._queue.put((operation, args, future), timeout=SUBMIT_TIMEOUT)
+        except queue.Full:
+            raise WriteQueueFull('Too many pending writes, try again later')
+        return future
+    
+    def execute(self, operation, *args):
+        """Queue operation(cursor, *args) and wait for it to be committed"""
+        return self.submit(operation, *args).result()
+    
+    def _connect(self):
+        # Under gevent, batches run on whichever threadpool thread is free
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA busy_timeout = 5000')
+        if WRITER_SYNCHRONOUS:
+            conn.execute(f'PRAGMA synchronous = {WRITER_SYNCHRONOUS}')
+        return conn
+    
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is None:
+                break
+        return batch
+    
+    def _run(self):
+        conn = self._connect()
+        offload = _os_thread_runner()
+        try:
+            running = True
+            while running:
+                batch = self._collect(self._queue.get())
+                if batch[-1] is None:
+                    running = False
+                    batch.pop()
+                if batch:
+                    self._commit_batch(conn, batch, offload)
+        finally:
+            conn.close()
+    
+    def _commit_batch(self, conn, batch, offload=None):
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            if offload is not None:
+                results = offload(self._apply_batch, conn, batch)
+            else:
+                results = self._apply_batch(conn, batch)
+        except Exception as e:
+            # The whole batch failed (e.g. database locked): fail every caller
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+    
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+    
+    def _apply_batch(self, conn, batch):
+        """Run a batch in one transaction; returns (future, result, error) per write"""
+        cursor = conn.cursor()
+        results = []
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for operation, args, future in batch:
+                cursor.execute('SAVEPOINT write_op')
+                try:
+                    results.append((future, operation(cursor, *args), None))
+                    cursor.execute('RELEASE write_op')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO write_op')
+                    cursor.execute('RELEASE write_op')
+                    results.append((future, None, e))
+            cursor.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        return results
+
+def _os_thread_runner():
+    """
+    Under gevent's monkey-patching (server.py) the writer thread is a
+    greenlet, and a blocking sqlite3 call in it (up to busy_timeout) would
+    stall every other greenlet, idle SSE streams included. Returns a
+    function that runs a call on a real OS thread from gevent's threadpool
+    while the writer greenlet waits cooperatively, or None when gevent
+    isn't patching threads.
+    """
+    monkey = sys.modules.get('gevent.monkey')
+    if monkey is None or not monkey.is_module_patched('threading'):
+        return None
+    import gevent
+    threadpool = gevent.get_hub().threadpool
+    return lambda function, *args: threadpool.apply(function, args)
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+def get_write_queue():
+    """Process-wide write queue, started on first use"""
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            _write_queue = WriteQueue()
+            atexit.register(_write_queue.stop)
+    return _write_queue
+
+def execute_write(operation, *args):
+    """Run operation(cursor, *args) on the shared writer and return its result"""
+    return get_write_queue().execute(operation, *args)
@@ -15,13 +15,11 @@ function AdminDashboard({ user, onLogout }) {
     const token = localStorage.getItem('session_token');
 
     try {
-      const [usersRes, eventsRes] = await Promise.all([
-        api.getAllUsers(token),
-        api.getEvents()
-      ]);
+      const res = await api.getDashboard(token);
+      const { sections } = res.data;
 
-      setUsers(usersRes.data);
-      setEvents(eventsRes.data);
+      setUsers(sections.users.data);
+      setEvents(sections.events.data);
     } catch (err) {
       setMessage('Error loading data');
     } finally {
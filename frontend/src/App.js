@@ -4,6 +4,7 @@ import Register from './Register';
 import StudentDashboard from './StudentDashboard';
 import OrganizerDashboard from './OrganizerDashboard';
 import AdminDashboard from './AdminDashboard';
+import { api } from './api';
 
 function App() {
   const [currentPage, setCurrentPage] = useState('login');
@@ -29,6 +30,10 @@ function App() {
   };
 
   const handleLogout = () => {
+    const sessionToken = localStorage.getItem('session_token');
+    if (sessionToken) {
+      api.logout(sessionToken).catch(() => {});
+    }
     localStorage.removeItem('session_token');
     localStorage.removeItem('user');
     setUser(null);
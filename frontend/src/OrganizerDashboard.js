@@ -1,5 +1,5 @@
-import React, { useState, useEffect } from 'react';
-import { api } from './api';
+import React, { useState, useEffect, useRef } from 'react';
+import { api, createActionKeys } from './api';
 
 function OrganizerDashboard({ user, onLogout }) {
   const [events, setEvents] = useState([]);
@@ -14,6 +14,7 @@ function OrganizerDashboard({ user, onLogout }) {
   });
   const [message, setMessage] = useState('');
   const [loading, setLoading] = useState(true);
+  const actionKeys = useRef(createActionKeys()).current;
 
   useEffect(() => {
     loadEvents();
@@ -59,12 +60,15 @@ function OrganizerDashboard({ user, onLogout }) {
 
   const handleMarkAttendance = async (registrationId) => {
     const token = localStorage.getItem('session_token');
+    const action = `attendance:${registrationId}`;
 
     try {
-      await api.markAttendance(registrationId, token);
+      await api.markAttendance(registrationId, token, actionKeys.keyFor(action));
+      actionKeys.settle(action);
       setMessage('Attendance marked!');
       loadRegistrations(selectedEvent);
     } catch (err) {
+      actionKeys.settle(action, err);
       setMessage('Error marking attendance');
     }
   };
@@ -72,11 +76,15 @@ function OrganizerDashboard({ user, onLogout }) {
   const handleGenerateCertificate = async (registrationId) => {
     const token = localStorage.getItem('session_token');
 
+    const action = `certificate:${registrationId}`;
+
     try {
-      await api.generateCertificate(registrationId, token);
+      await api.generateCertificate(registrationId, token, actionKeys.keyFor(action));
+      actionKeys.settle(action);
       setMessage('Certificate generated!');
       loadRegistrations(selectedEvent);
     } catch (err) {
+      actionKeys.settle(action, err);
       setMessage(err.response?.data?.error || 'Error generating certificate');
     }
   };
@@ -1,5 +1,5 @@
-import React, { useState, useEffect } from 'react';
-import { api } from './api';
+import React, { useState, useEffect, useRef } from 'react';
+import { api, createActionKeys } from './api';
 
 function StudentDashboard({ user, onLogout }) {
   const [events, setEvents] = useState([]);
@@ -7,24 +7,35 @@ function StudentDashboard({ user, onLogout }) {
   const [myCertificates, setMyCertificates] = useState([]);
   const [loading, setLoading] = useState(true);
   const [message, setMessage] = useState('');
+  const actionKeys = useRef(createActionKeys()).current;
 
   useEffect(() => {
     loadData();
+
+    // Live deltas instead of refetching whole lists
+    const token = localStorage.getItem('session_token');
+    const addOrReplace = (list, item) => [item, ...list.filter(x => x.id !== item.id)];
+
+    return api.subscribeChanges(token, {
+      event_created: (event) => setEvents(prev => addOrReplace(prev, event)),
+      registration_created: (reg) => setMyRegistrations(prev => addOrReplace(prev, reg)),
+      attendance_marked: ({ registration_id }) => setMyRegistrations(prev =>
+        prev.map(r => r.id === registration_id ? { ...r, attendance_marked: 1 } : r)),
+      certificate_issued: (cert) => setMyCertificates(prev => addOrReplace(prev, cert)),
+      resync: () => loadData()
+    });
   }, []);
 
   const loadData = async () => {
     const token = localStorage.getItem('session_token');
     
     try {
-      const [eventsRes, regsRes, certsRes] = await Promise.all([
-        api.getEvents(),
-        api.getMyRegistrations(token),
-        api.getMyCertificates(token)
-      ]);
+      const res = await api.getDashboard(token);
+      const { sections } = res.data;
 
-      setEvents(eventsRes.data);
-      setMyRegistrations(regsRes.data);
-      setMyCertificates(certsRes.data);
+      setEvents(sections.events.data);
+      setMyRegistrations(sections.registrations.data);
+      setMyCertificates(sections.certificates.data);
     } catch (err) {
       setMessage('Error loading data');
     } finally {
@@ -35,11 +46,15 @@ function StudentDashboard({ user, onLogout }) {
   const handleRegister = async (eventId) => {
     const token = localStorage.getItem('session_token');
     
+    const action = `register:${eventId}`;
+    
     try {
-      await api.registerForEvent(eventId, token);
+      await api.registerForEvent(eventId, token, actionKeys.keyFor(action));
+      actionKeys.settle(action);
       setMessage('Registered successfully!');
       loadData();
     } catch (err) {
+      actionKeys.settle(action, err);
       setMessage(err.response?.data?.error || 'Registration failed');
     }
   };
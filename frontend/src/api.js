@@ -2,6 +2,49 @@ import axios from 'axios';
 
 const API_URL = 'http://localhost:5000/api';
 
+// Idempotency-Key for one user action. crypto.randomUUID only exists in
+// secure contexts (HTTPS or localhost); getRandomValues works everywhere.
+export const newIdempotencyKey = () => {
+  if (window.crypto?.randomUUID) return window.crypto.randomUUID();
+  if (window.crypto?.getRandomValues) {
+    const bytes = window.crypto.getRandomValues(new Uint8Array(16));
+    return Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
+};
+
+// An action has a definite outcome once the server answered below 500;
+// until then (network error, 5xx) retrying it must reuse its key
+const isDefinite = (err) => Boolean(err?.response) && err.response.status < 500;
+
+// Keys for a dashboard's pending actions ('attendance:12', ...): the same
+// action gets the same key until it has a definite outcome, so clicking
+// again after a failed attempt is deduplicated by the server
+export const createActionKeys = () => {
+  const pending = {};
+  return {
+    keyFor: (action) => {
+      if (!pending[action]) pending[action] = newIdempotencyKey();
+      return pending[action];
+    },
+    settle: (action, err) => {
+      if (!err || isDefinite(err)) delete pending[action];
+    }
+  };
+};
+
+// Send a keyed POST, retrying with the same key while the outcome is unknown
+const withRetries = async (send, attempts = 3) => {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await send();
+    } catch (err) {
+      if (attempt >= attempts || isDefinite(err)) throw err;
+      await new Promise((resolve) => setTimeout(resolve, 500 * attempt));
+    }
+  }
+};
+
 export const api = {
   register: (userData) => 
     axios.post(`${API_URL}/register`, userData),
@@ -12,18 +55,30 @@ export const api = {
   verifyTotp: (data) => 
     axios.post(`${API_URL}/verify-totp`, data),
   
+  logout: (token) => 
+    axios.post(`${API_URL}/logout`, null, {
+      headers: { Authorization: token }
+    }),
+  
   getEvents: () => 
     axios.get(`${API_URL}/events`),
   
+  searchEvents: (params) => 
+    axios.get(`${API_URL}/events/search`, { params }),
+  
   createEvent: (eventData, token) => 
     axios.post(`${API_URL}/events`, eventData, {
       headers: { Authorization: token }
     }),
   
-  registerForEvent: (eventId, token) => 
-    axios.post(`${API_URL}/register-event`, { event_id: eventId }, {
-      headers: { Authorization: token }
-    }),
+  // registerForEvent, markAttendance and generateCertificate send an
+  // Idempotency-Key (pass the action's key from createActionKeys) and
+  // retry with it, so the server answers a repeat with the original
+  // response instead of redoing the work
+  registerForEvent: (eventId, token, idempotencyKey = newIdempotencyKey()) => 
+    withRetries(() => axios.post(`${API_URL}/register-event`, { event_id: eventId }, {
+      headers: { Authorization: token, 'Idempotency-Key': idempotencyKey }
+    })),
   
   getMyRegistrations: (token) => 
     axios.get(`${API_URL}/my-registrations`, {
@@ -35,26 +90,99 @@ export const api = {
       headers: { Authorization: token }
     }),
   
-  markAttendance: (registrationId, token) => 
-    axios.post(`${API_URL}/mark-attendance`, { registration_id: registrationId }, {
-      headers: { Authorization: token }
-    }),
+  markAttendance: (registrationId, token, idempotencyKey = newIdempotencyKey()) => 
+    withRetries(() => axios.post(`${API_URL}/mark-attendance`, { registration_id: registrationId }, {
+      headers: { Authorization: token, 'Idempotency-Key': idempotencyKey }
+    })),
   
-  generateCertificate: (registrationId, token) => 
-    axios.post(`${API_URL}/generate-certificate`, { registration_id: registrationId }, {
-      headers: { Authorization: token }
-    }),
+  generateCertificate: (registrationId, token, idempotencyKey = newIdempotencyKey()) => 
+    withRetries(() => axios.post(`${API_URL}/generate-certificate`, { registration_id: registrationId }, {
+      headers: { Authorization: token, 'Idempotency-Key': idempotencyKey }
+    })),
   
   getMyCertificates: (token) => 
     axios.get(`${API_URL}/my-certificates`, {
       headers: { Authorization: token }
     }),
   
+  downloadCertificate: (certificateId, token, format = 'pdf') => 
+    axios.get(`${API_URL}/certificates/${certificateId}/document`, {
+      params: { format },
+      headers: { Authorization: token },
+      responseType: 'blob'
+    }),
+  
+  exportEventCertificates: (eventId, token, format = 'pdf') => 
+    axios.get(`${API_URL}/events/${eventId}/certificates/export`, {
+      params: { format },
+      headers: { Authorization: token },
+      responseType: 'blob'
+    }),
+  
   verifyCertificate: (certificateId) => 
     axios.get(`${API_URL}/verify-certificate/${certificateId}`),
   
   getAllUsers: (token) => 
     axios.get(`${API_URL}/admin/users`, {
       headers: { Authorization: token }
-    })
+    }),
+  
+  getDashboard: (token, etags = {}) => 
+    axios.get(`${API_URL}/dashboard`, {
+      params: etags,
+      headers: { Authorization: token }
+    }),
+  
+  // Server-Sent Events; handlers maps change type -> callback(data).
+  // Returns an unsubscribe function.
+  // EventSource can't send headers, so each connection is opened with a
+  // single-use ticket (the session token never goes in a URL). A spent
+  // ticket can't be retried, so reconnects fetch a new one and resume
+  // from the last change seen.
+  subscribeChanges: (token, handlers) => {
+    let source = null;
+    let retryTimer = null;
+    let lastEventId = null;
+    let closed = false;
+
+    const connect = async () => {
+      try {
+        const res = await axios.post(`${API_URL}/changes/ticket`, null, {
+          headers: { Authorization: token }
+        });
+        if (closed) return;
+        const params = new URLSearchParams({ ticket: res.data.ticket });
+        if (lastEventId) params.set('last_event_id', lastEventId);
+        source = new EventSource(`${API_URL}/changes?${params}`);
+        Object.entries(handlers).forEach(([type, handler]) => {
+          source.addEventListener(type, (e) => {
+            if (e.lastEventId) lastEventId = e.lastEventId;
+            handler(JSON.parse(e.data));
+          });
+        });
+        source.onerror = () => {
+          source.close();
+          if (!closed) retryTimer = setTimeout(connect, 3000);
+        };
+      } catch (err) {
+        // Logged out or session expired: stop reconnecting
+        if (!closed && err.response?.status !== 401) retryTimer = setTimeout(connect, 3000);
+      }
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  },
+  
+  bulkImportUsers: (file, token) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    return axios.post(`${API_URL}/admin/users/import`, formData, {
+      headers: { Authorization: token }
+    });
+  }
 };
\ No newline at end of file